@@ -1,6 +1,10 @@
+import argparse
 import pygame
 from src.game import Game
 
 if __name__ == '__main__':
-    game = Game()
+    parser = argparse.ArgumentParser(description="Autonomous snake game.")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded replay file")
+    args = parser.parse_args()
+    game = Game(replay_path=args.replay)
     game.run()
@@ -0,0 +1,342 @@
+"""Batched NumPy environment for training and tuning snake policies.
+
+BatchEnv holds many independent boards in contiguous arrays and advances all
+of them with one step(actions) call, so learned or parameterized policies can
+be trained against the built-in planners without a Python loop per board.
+Needs NumPy; check HAS_NUMPY first.
+
+    env = BatchEnv(1024, grid_size=20, num_snakes=4)
+    observations = env.reset()
+    observations, rewards, dones, info = env.step(actions)
+"""
+import random
+from src.occupancy import OccupancyGrid
+from src.pathfinding import get_workspace
+from src.scheduler import SEARCH_METHODS
+from src.settings import settings, INITIAL_SNAKE_LENGTH
+from src.simulation import start_positions
+from src.vectorized import HAS_NUMPY, np
+
+ACTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # up, right, down, left
+HEAD = 128  # observation code of snake k's head is HEAD + k, its body k + 1
+FOOD = 254
+MAX_SNAKES = FOOD - HEAD
+FOOD_DRAWS = 4
+
+
+class BatchEnv:
+    """num_envs independent games stepped together with whole-array operations.
+
+    The first num_agents snakes on every board are driven by the actions passed
+    to step(); the others are opponents using the built-in planners. Moves are
+    resolved simultaneously against the tick-start board, like the Simulator's
+    "simultaneous" collision mode, and dead snakes stay on the board. A board
+    is done when all its agents are dead, at most one snake is left (with more
+    than one snake), the board is full or max_ticks is reached; done boards are
+    reset automatically inside step().
+
+    With opponent_backend "numpy" all opponents follow one bit-packed BFS from
+    the food per board, expanded for every board at once; Dijkstra,
+    A* and BFS all find shortest paths here, so only tie-breaking differs from
+    the Python planners. Backend "python" runs each opponent's own algorithm
+    from src.pathfinding exactly, one search at a time.
+    """
+
+    def __init__(self, num_envs, grid_size=None, num_snakes=None, num_agents=1, opponents=None,
+                 opponent_backend="numpy", max_ticks=None, food_reward=1.0, death_reward=-1.0, seed=None):
+        """Allocates the board arrays and resets every board."""
+        if not HAS_NUMPY:
+            raise ImportError("BatchEnv needs NumPy")
+        self.num_envs = num_envs
+        self.grid_size = grid_size if grid_size is not None else settings.grid_size
+        self.num_snakes = num_snakes if num_snakes is not None else settings.num_snakes
+        self.num_agents = num_agents
+        if not 0 < num_agents <= self.num_snakes <= MAX_SNAKES:
+            raise ValueError(f"need 0 < num_agents <= num_snakes <= {MAX_SNAKES}")
+        self.opponents = list(opponents) if opponents is not None else settings.selected_algorithms
+        self.opponent_backend = opponent_backend
+        self.max_ticks = max_ticks if max_ticks is not None else settings.batch_env_max_ticks
+        self.food_reward = food_reward
+        self.death_reward = death_reward
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = np.random.default_rng(self.seed)
+
+        size = self.grid_size
+        cells = size * size
+        self.capacity = cells
+        self.base = np.frombuffer(bytes(OccupancyGrid.walled(size).cells), dtype=np.uint8)
+        self.offsets = np.array([dy * size + dx for dx, dy in ACTIONS], dtype=np.int64)
+        self.starts = start_positions(size, self.num_snakes)
+
+        shape = (num_envs, self.num_snakes)
+        self.board = np.empty((num_envs, cells), dtype=np.uint8)
+        self.bodies = np.zeros(shape + (self.capacity,), dtype=np.int32)
+        self.head_slot = np.zeros(shape, dtype=np.int64)
+        self.length = np.zeros(shape, dtype=np.int64)
+        self.heads = np.zeros(shape, dtype=np.int64)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.scores = np.zeros(shape, dtype=np.int64)
+        self.food = np.full(num_envs, -1, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.observations = np.empty((num_envs, size, size), dtype=np.uint8)
+        self.reset()
+
+    def reset(self):
+        """Resets every board and returns the observations."""
+        self._reset_boards(np.arange(self.num_envs))
+        return self.observe()
+
+    def _reset_boards(self, boards):
+        """Puts fresh snakes and food on the given boards."""
+        count = len(boards)
+        if count == 0:
+            return
+        size, num_snakes = self.grid_size, self.num_snakes
+        self.board[boards] = self.base
+        if self.starts is not None:
+            starts = np.array([y * size + x for x, y in self.starts], dtype=np.int64)
+            starts = np.broadcast_to(starts, (count, num_snakes))
+        else:
+            interior = np.flatnonzero(self.base == 0)
+            if len(interior) < num_snakes:
+                raise ValueError(f"no room for {num_snakes} snakes on a {size}x{size} grid")
+            picks = self.rng.random((count, len(interior))).argsort(axis=1)[:, :num_snakes]
+            starts = interior[picks]
+        self.heads[boards] = starts
+        self.head_slot[boards] = 0
+        self.length[boards] = INITIAL_SNAKE_LENGTH
+        self.bodies[boards, :, :INITIAL_SNAKE_LENGTH] = starts[:, :, None]
+        self.board[boards[:, None], starts] = np.arange(1, num_snakes + 1, dtype=np.uint8)
+        self.alive[boards] = True
+        self.scores[boards] = 0
+        self.ticks[boards] = 0
+        self._spawn_food(boards)
+
+    def _spawn_food(self, boards):
+        """Places food on a uniformly random free cell of each given board (-1 when full).
+
+        A few rounds of drawing random cells settle most boards cheaply; only
+        the crowded rest count their free cells.
+        """
+        cells = self.board.shape[1]
+        for _ in range(FOOD_DRAWS):
+            if len(boards) == 0:
+                return
+            draws = self.rng.integers(cells, size=len(boards))
+            hit = self.board[boards, draws] == 0
+            self.food[boards[hit]] = draws[hit]
+            boards = boards[~hit]
+        free = self.board[boards] == 0
+        counts = free.sum(axis=1)
+        picks = (self.rng.random(len(boards)) * counts).astype(np.int64)
+        food = (free.cumsum(axis=1) <= picks[:, None]).sum(axis=1)
+        self.food[boards] = np.where(counts > 0, food, -1)
+
+    def observe(self):
+        """Returns the (num_envs, size, size) uint8 observation buffer.
+
+        Cells hold 0 when free, k + 1 for snake k's body, HEAD + k for its head
+        (while alive), FOOD and WALL (255). The buffer is reused by every call.
+        """
+        observations = self.observations.reshape(self.num_envs, -1)
+        np.copyto(observations, self.board)
+        boards, snakes = np.nonzero(self.alive)
+        observations[boards, self.heads[boards, snakes]] = HEAD + snakes
+        boards = np.flatnonzero(self.food >= 0)
+        observations[boards, self.food[boards]] = FOOD
+        return self.observations
+
+    def step(self, actions):
+        """Advances every board by one tick.
+
+        actions holds one index into ACTIONS per agent, shaped (num_envs,) or
+        (num_envs, num_agents). Returns (observations, rewards, dones, info):
+        rewards is (num_envs, num_agents) float32, dones marks boards that
+        finished (and were reset) this tick, and info holds their "final_scores"
+        and "final_ticks", valid where dones is set.
+        """
+        num_agents = self.num_agents
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs, num_agents)
+        alive = self.alive
+        targets = np.empty(alive.shape, dtype=np.int64)
+        targets[:, :num_agents] = self.heads[:, :num_agents] + self.offsets[actions]
+        if self.num_snakes > num_agents:
+            targets[:, num_agents:] = self._opponent_moves()
+        trapped = alive & (targets < 0)
+        moving = alive & ~trapped
+
+        # A unique negative stand-in per snake keeps non-movers from matching anything.
+        claimed = np.where(moving, targets, -1 - np.arange(self.num_snakes))
+        contested = (claimed[:, :, None] == claimed[:, None, :]).sum(axis=2) > 1
+        rows = np.arange(self.num_envs)[:, None]
+        blocked = self.board[rows, np.where(moving, targets, 0)] != 0
+        crashed = moving & (contested | blocked)
+        died = trapped | crashed
+        alive &= ~died
+        grew = self._advance(moving & ~crashed, targets)
+
+        rewards = np.zeros((self.num_envs, num_agents), dtype=np.float32)
+        rewards += grew[:, :num_agents] * np.float32(self.food_reward)
+        rewards += died[:, :num_agents] * np.float32(self.death_reward)
+        self._spawn_food(np.flatnonzero(grew.any(axis=1)))
+        self.ticks += 1
+
+        dones = ~alive[:, :num_agents].any(axis=1) | (self.food < 0) | (self.ticks >= self.max_ticks)
+        if self.num_snakes > 1:
+            dones |= alive.sum(axis=1) <= 1
+        info = {"final_scores": self.scores.copy(), "final_ticks": self.ticks.copy()}
+        self._reset_boards(np.flatnonzero(dones))
+        return self.observe(), rewards, dones, info
+
+    def _advance(self, movers, targets):
+        """Moves the given snakes' heads onto their targets; returns which of them ate."""
+        boards, snakes = np.nonzero(movers)
+        new_heads = targets[boards, snakes]
+        grow = new_heads == self.food[boards]
+        capacity = self.capacity
+        head_slot = self.head_slot[boards, snakes]
+        tail_slot = (head_slot + self.length[boards, snakes] - 1) % capacity
+        tails = self.bodies[boards, snakes, tail_slot]
+        # Stacked start segments share a cell, so it only frees once the last one leaves.
+        next_tails = self.bodies[boards, snakes, (tail_slot - 1) % capacity]
+
+        head_slot = (head_slot - 1) % capacity
+        self.bodies[boards, snakes, head_slot] = new_heads
+        self.head_slot[boards, snakes] = head_slot
+        self.heads[boards, snakes] = new_heads
+        self.board[boards, new_heads] = snakes + 1
+        release = ~grow & (next_tails != tails)
+        self.board[boards[release], tails[release]] = 0
+        self.length[boards[grow], snakes[grow]] += 1
+        self.scores[boards[grow], snakes[grow]] += 1
+
+        grew = np.zeros(movers.shape, dtype=bool)
+        grew[boards[grow], snakes[grow]] = True
+        return grew
+
+    def _opponent_moves(self):
+        """Returns each opponent's target cell, or -1 where it is dead or trapped."""
+        first = self.num_agents
+        active = self.alive[:, first:]
+        moves = np.full(active.shape, -1, dtype=np.int64)
+        boards = np.flatnonzero(active.any(axis=1))
+        if len(boards) == 0:
+            return moves
+        neighbors = self.heads[boards, first:, None] + self.offsets
+        if self.opponent_backend == "python":
+            choice = self._search_moves(boards, neighbors, active[boards])
+        else:
+            choice = self._field_moves(boards, neighbors, active[boards])
+        moves[boards] = np.where(choice >= 0, np.take_along_axis(neighbors, np.maximum(choice, 0)[..., None], 2)[..., 0], -1)
+        return moves
+
+    def _field_moves(self, boards, neighbors, active):
+        """Picks each opponent's action toward the food with one BFS per board.
+
+        Opponents with no route to the food take a random free neighbor, like the
+        Snake survival move; -1 marks those with none.
+        """
+        toward_food = self._toward_food(boards, neighbors, active)
+        free = self.board[boards[:, None, None], neighbors] == 0
+        order = (self.rng.integers(4, size=free.shape[:2])[..., None] + np.arange(4)) % 4
+        survival = np.take_along_axis(order, np.take_along_axis(free, order, 2).argmax(axis=2)[..., None], 2)[..., 0]
+        choice = np.where(toward_food >= 0, toward_food, survival)
+        return np.where(free.any(axis=2), choice, -1)
+
+    def _toward_food(self, boards, neighbors, active):
+        """Runs a BFS from the food of every given board at once; returns each opponent's first step.
+
+        Board rows are packed into 64-bit words and all boards are laid end to
+        end, so a step of the frontier is six shifts and masks over one flat
+        array; bits shifted across a row or board edge only land on border
+        walls and are masked away. An opponent's head is reached one step after
+        its nearest neighbors, which are then on the frontier; the first of them
+        in ACTIONS order is its move (-1 when the food is unreachable).
+        Expansion stops once every active opponent has been reached, and boards
+        whose opponents are all reached are dropped whenever they are the majority.
+        """
+        count, size = len(boards), self.grid_size
+        words = (size + 63) // 64
+        stride = size * words
+        free = (self.board[boards] == 0).reshape(count, size, size)
+        packed = np.zeros((count, size, words * 8), dtype=np.uint8)
+        packed[:, :, :(size + 7) // 8] = np.packbits(free, axis=2, bitorder="little")
+        unvisited = packed.view("<u8").ravel()
+
+        def locate(cells):
+            columns = cells % size
+            return cells // size * words + columns // 64, (columns % 64).astype(np.uint64)
+
+        one, top = np.uint64(1), np.uint64(63)
+        frontier = np.zeros_like(unvisited)
+        food = self.food[boards]
+        fed = np.flatnonzero(food >= 0)
+        food_words, food_bits = locate(food[fed])
+        frontier[fed * stride + food_words] = one << food_bits
+        unvisited &= ~frontier
+
+        neighbor_words, neighbor_bits = locate(neighbors)
+        waiting, opponents = np.nonzero(active)
+        head_words, head_bits = locate(self.heads[boards[waiting], self.num_agents + opponents])
+        slots = np.arange(count)
+        choice = np.full(active.shape, -1, dtype=np.int64)
+        grown, scratch = np.empty_like(frontier), np.empty_like(frontier)
+
+        while len(waiting) and frontier.any():
+            np.left_shift(frontier, one, out=grown)
+            np.right_shift(frontier[:-1], top, out=scratch[1:])
+            grown[1:] |= scratch[1:]
+            np.right_shift(frontier, one, out=scratch)
+            grown |= scratch
+            np.left_shift(frontier[1:], top, out=scratch[:-1])
+            grown[:-1] |= scratch[:-1]
+            grown[words:] |= frontier[:-words]
+            grown[:-words] |= frontier[words:]
+
+            arrived = (grown[slots[waiting] * stride + head_words] >> head_bits & one).astype(bool)
+            if arrived.any():
+                b, o = waiting[arrived], opponents[arrived]
+                on_frontier = frontier[slots[b, None] * stride + neighbor_words[b, o]] >> neighbor_bits[b, o] & one
+                choice[b, o] = on_frontier.argmax(axis=1)
+                left = ~arrived
+                waiting, opponents = waiting[left], opponents[left]
+                head_words, head_bits = head_words[left], head_bits[left]
+
+            np.bitwise_and(grown, unvisited, out=frontier)
+            unvisited ^= frontier
+            if arrived.any():
+                live = np.zeros(count, dtype=bool)
+                live[waiting] = True
+                kept = np.flatnonzero(live)
+                if 2 * len(kept) <= len(frontier) // stride:
+                    rows = slots[kept]
+                    frontier = frontier.reshape(-1, stride)[rows].ravel()
+                    unvisited = unvisited.reshape(-1, stride)[rows].ravel()
+                    grown, scratch = np.empty_like(frontier), np.empty_like(frontier)
+                    slots[kept] = np.arange(len(kept))
+        return choice
+
+    def _search_moves(self, boards, neighbors, active):
+        """Picks each opponent's action with its own planner from src.pathfinding."""
+        size, first = self.grid_size, self.num_agents
+        workspace = get_workspace(size, size)
+        choice = np.full(active.shape, -1, dtype=np.int64)
+        for row, board in enumerate(boards):
+            occupancy = OccupancyGrid.from_cells(size, size, self.board[board].tobytes())
+            food = int(self.food[board])
+            for column in np.flatnonzero(active[row]):
+                algorithm_name = self.opponents[column % len(self.opponents)]
+                head = int(self.heads[board, first + column])
+                path = None
+                if food >= 0:
+                    search = getattr(workspace, SEARCH_METHODS.get(algorithm_name, "dijkstra"))
+                    path = search(occupancy, (head % size, head // size), (food % size, food // size))
+                if path and len(path) > 1:
+                    x, y = path[1]
+                    choice[row, column] = int(np.flatnonzero(neighbors[row, column] == y * size + x)[0])
+                else:
+                    for action in self.rng.permutation(4):
+                        if occupancy.cells[neighbors[row, column, action]] == 0:
+                            choice[row, column] = action
+                            break
+        return choice
@@ -0,0 +1,221 @@
+"""Benchmarks the planners and headless ticks on fixed-seed boards.
+
+Usage:
+    python -m src.benchmark --output bench.json
+    python -m src.benchmark --output new.json --baseline bench.json --threshold 0.10
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from src.batch_env import ACTIONS, BatchEnv
+from src.occupancy import OccupancyGrid
+from src.pathfinding import dijkstra, astar, bfs, jps, get_workspace
+from src.scheduler import PlanningScheduler
+from src.settings import settings
+from src.simulation import Simulator
+from src import vectorized
+
+PLANNERS = {"dijkstra": dijkstra, "astar": astar, "bfs": bfs, "jps": jps}
+if vectorized.HAS_NUMPY:
+    PLANNERS["wavefront"] = vectorized.wavefront_bfs
+DEFAULT_SIZES = [20, 50, 100, 200, 500, 1000]
+DEFAULT_DENSITIES = [0.0, 0.1, 0.25]
+PATH_LENGTHS = {"short": 0.25, "medium": 1.0, "long": 2.0}
+
+
+def generate_board(size, density, seed):
+    """Builds a walled board with randomly placed interior walls."""
+    rng = random.Random(seed)
+    occupancy = OccupancyGrid.walled(size)
+    w = occupancy.width
+    for y in range(1, size - 1):
+        for x in range(1, size - 1):
+            if rng.random() < density:
+                occupancy.add_wall(y * w + x)
+    return occupancy
+
+
+def pick_query(occupancy, target_length, seed):
+    """Picks a start and the reachable end whose BFS distance is closest to target_length."""
+    rng = random.Random(seed)
+    start = occupancy.random_free_cell(rng)
+    workspace = get_workspace(occupancy.width, occupancy.height)
+    generation = workspace.flood(occupancy, start)
+    best, best_gap = start, None
+    for index in occupancy.free:
+        if workspace.stamp[index] != generation:
+            continue
+        gap = abs(workspace.distance[index] - target_length)
+        if best_gap is None or gap < best_gap:
+            best, best_gap = occupancy.position(index), gap
+    return start, best
+
+
+def time_call(function, repeats):
+    """Returns the best wall time of repeated calls and the last result."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def bench_planners(sizes, densities, repeats, seed):
+    results = {}
+    for size in sizes:
+        for density in densities:
+            occupancy = generate_board(size, density, seed)
+            for length_name, factor in PATH_LENGTHS.items():
+                start, end = pick_query(occupancy, int(size * factor), seed)
+                for name, planner in PLANNERS.items():
+                    seconds, path = time_call(lambda: planner(occupancy, start, end), repeats)
+                    key = f"planner/{name}/size={size}/density={density}/length={length_name}"
+                    results[key] = {
+                        "metric": "seconds",
+                        "value": seconds,
+                        "path_length": len(path) - 1 if path else None,
+                        "nodes_expanded": get_workspace(size, size).expanded if name != "wavefront" else None,
+                    }
+                    print(f"{key}: {seconds * 1000:.3f} ms", file=sys.stderr)
+    return results
+
+
+def bench_ticks(sizes, modes, max_ticks, seed, snake_counts=(4,), collision_mode="sequential", backend="python",
+                planning_workers=0, deterministic=False, safety_algorithms=()):
+    results = {}
+    for size in sizes:
+        for mode in modes:
+            for num_snakes in snake_counts:
+                scheduler = PlanningScheduler(planning_workers, deterministic=deterministic) if planning_workers else None
+                simulator = Simulator(grid_size=size, planning_mode=mode, num_snakes=num_snakes,
+                                      collision_mode=collision_mode, backends=[backend], scheduler=scheduler,
+                                      seed=seed, safety_algorithms=safety_algorithms)
+                started = time.perf_counter()
+                ticks = simulator.run_until_done(max_ticks)
+                elapsed = time.perf_counter() - started
+                if scheduler:
+                    scheduler.close()
+                key = f"ticks/mode={mode}/size={size}"
+                if num_snakes != 4:
+                    key += f"/snakes={num_snakes}"
+                if collision_mode != "sequential":
+                    key += f"/collision={collision_mode}"
+                if backend != "python":
+                    key += f"/backend={backend}"
+                if planning_workers:
+                    key += f"/workers={planning_workers}" + ("/deterministic" if deterministic else "")
+                if safety_algorithms:
+                    key += "/safety=" + "+".join(safety_algorithms)
+                results[key] = {
+                    "metric": "ticks_per_second",
+                    "value": ticks / elapsed if elapsed > 0 else 0.0,
+                    "ticks": ticks,
+                }
+                if safety_algorithms:
+                    results[key]["safety"] = simulator.safety_stats()
+                print(f"{key}: {results[key]['value']:.0f} ticks/s", file=sys.stderr)
+    return results
+
+
+def bench_batch_env(num_envs, sizes, snake_counts, steps, seed):
+    """Measures BatchEnv throughput with one random-action agent against planner opponents."""
+    results = {}
+    if not num_envs or not vectorized.HAS_NUMPY:
+        return results
+    np = vectorized.np
+    for size in sizes:
+        for num_snakes in snake_counts:
+            env = BatchEnv(num_envs, grid_size=size, num_snakes=num_snakes, seed=seed)
+            actions = np.random.default_rng(seed).integers(len(ACTIONS), size=(steps, num_envs))
+            started = time.perf_counter()
+            for step_actions in actions:
+                env.step(step_actions)
+            elapsed = time.perf_counter() - started
+            key = f"batch_env/envs={num_envs}/size={size}/snakes={num_snakes}"
+            results[key] = {
+                "metric": "snake_steps_per_second",
+                "value": steps * num_envs * num_snakes / elapsed if elapsed > 0 else 0.0,
+                "steps": steps,
+            }
+            print(f"{key}: {results[key]['value']:.0f} snake-steps/s", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns (key, slowdown) for every entry slower than the baseline by more than threshold."""
+    regressions = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if not base or not base["value"] or not entry["value"]:
+            continue
+        if entry["metric"] == "seconds":
+            slowdown = entry["value"] / base["value"]
+        else:
+            slowdown = base["value"] / entry["value"]
+        if slowdown > 1 + threshold:
+            regressions.append((key, slowdown))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark planners and headless game ticks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=DEFAULT_DENSITIES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tick-sizes", type=int, nargs="+", default=[20, 30, 40, 100])
+    parser.add_argument("--modes", nargs="+", default=["search", "field", "cached"])
+    parser.add_argument("--tick-snakes", type=int, nargs="+", default=[4])
+    parser.add_argument("--collision-mode", choices=settings.collision_modes, default=settings.collision_mode)
+    parser.add_argument("--backend", choices=settings.search_backends, default="python")
+    parser.add_argument("--planning-workers", type=int, default=0, help="plan ticks concurrently (0 = off)")
+    parser.add_argument("--deterministic", action="store_true", help="bound planning by nodes, not time")
+    parser.add_argument("--safety", nargs="+", default=[], metavar="ALGORITHM",
+                        help="algorithms whose snakes avoid boxing themselves in")
+    parser.add_argument("--max-ticks", type=int, default=500)
+    parser.add_argument("--batch-envs", type=int, default=1024, help="boards per BatchEnv (0 = skip)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--batch-snakes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--batch-steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results = {}
+    results.update(bench_planners(args.sizes, args.densities, args.repeats, args.seed))
+    results.update(bench_ticks(args.tick_sizes, args.modes, args.max_ticks, args.seed,
+                               args.tick_snakes, args.collision_mode, args.backend,
+                               args.planning_workers, args.deterministic, args.safety))
+    results.update(bench_batch_env(args.batch_envs, args.batch_sizes, args.batch_snakes, args.batch_steps, args.seed))
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, slowdown in regressions:
+            print(f"REGRESSION {key}: {slowdown:.2f}x slower than baseline")
+        if regressions:
+            return 1
+        print("No regressions above threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from src.settings import settings
+
+
+class Camera:
+    """Scrollable, zoomable viewport that maps board cells to window pixels."""
+
+    def __init__(self, board_width, board_height, view_width, view_height, cell_size=None):
+        """Initializes the camera at the top-left corner, zoomed to fit the board if possible."""
+        self.board_width = board_width
+        self.board_height = board_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.cell_size = cell_size if cell_size is not None else self.fit_zoom()
+        self.x = 0
+        self.y = 0
+        self.clamp()
+
+    def fit_zoom(self):
+        """Returns the largest zoom level (pixels per cell) that shows the whole board."""
+        fitting = [
+            level for level in settings.zoom_levels
+            if level * self.board_width <= self.view_width and level * self.board_height <= self.view_height
+        ]
+        return max(fitting) if fitting else min(settings.zoom_levels)
+
+    @property
+    def columns(self):
+        return -(-self.view_width // self.cell_size)
+
+    @property
+    def rows(self):
+        return -(-self.view_height // self.cell_size)
+
+    def shows_whole_board(self):
+        return (self.x == 0 and self.y == 0 and
+                self.board_width * self.cell_size <= self.view_width and
+                self.board_height * self.cell_size <= self.view_height)
+
+    def clamp(self):
+        """Keeps the viewport inside the board."""
+        self.x = max(0, min(self.x, self.board_width - self.view_width // self.cell_size))
+        self.y = max(0, min(self.y, self.board_height - self.view_height // self.cell_size))
+
+    def pan(self, dx, dy):
+        """Scrolls by a number of cells."""
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def center_on(self, pos):
+        self.x = pos[0] - self.view_width // self.cell_size // 2
+        self.y = pos[1] - self.view_height // self.cell_size // 2
+        self.clamp()
+
+    def zoom(self, steps):
+        """Moves through settings.zoom_levels, keeping the centre cell in place."""
+        levels = sorted(settings.zoom_levels)
+        current = min(range(len(levels)), key=lambda i: abs(levels[i] - self.cell_size))
+        center = (self.x + self.view_width // self.cell_size // 2, self.y + self.view_height // self.cell_size // 2)
+        self.cell_size = levels[max(0, min(current + steps, len(levels) - 1))]
+        self.center_on(center)
+
+    def visible_range(self):
+        """Returns (x0, y0, x1, y1), the half-open range of board cells on screen."""
+        return (self.x, self.y,
+                min(self.board_width, self.x + self.columns),
+                min(self.board_height, self.y + self.rows))
+
+    def is_visible(self, pos):
+        return self.x <= pos[0] < self.x + self.columns and self.y <= pos[1] < self.y + self.rows
+
+    def to_screen(self, pos):
+        return ((pos[0] - self.x) * self.cell_size, (pos[1] - self.y) * self.cell_size)
+
+    def to_cell(self, point):
+        return (self.x + point[0] // self.cell_size, self.y + point[1] // self.cell_size)
@@ -0,0 +1,30 @@
+import pygame
+from src.settings import settings
+
+
+def draw_grid(screen, grid_size=None, cell_size=None):
+    """Draws the game grid on the screen."""
+    grid_size = grid_size if grid_size is not None else settings.grid_size
+    cell_size = cell_size if cell_size is not None else settings.cell_size
+    width = height = grid_size * cell_size
+    line_thickness = 1
+    for x in range(0, width, cell_size):
+        pygame.draw.line(screen, settings.grid_color, (x, 0), (x, height), line_thickness)
+    for y in range(0, height, cell_size):
+        pygame.draw.line(screen, settings.grid_color, (0, y), (width, y), line_thickness)
+
+def draw_cell(screen, pos, color, cell_size=None):
+    """Fills one grid cell and returns its rect."""
+    cell_size = cell_size if cell_size is not None else settings.cell_size
+    rect = pygame.Rect(pos[0] * cell_size, pos[1] * cell_size, cell_size, cell_size)
+    pygame.draw.rect(screen, color, rect)
+    return rect
+
+def draw_snake(screen, snake, cell_size=None):
+    """Draws a snake on the screen."""
+    for segment in snake.body:
+        draw_cell(screen, segment, snake.color, cell_size)
+
+def draw_food(screen, food_pos, cell_size=None):
+    """Draws food on the screen."""
+    return draw_cell(screen, food_pos, settings.food_color, cell_size)
@@ -1,65 +1,75 @@
+import os
+import pygame
+from time import perf_counter
+from src.settings import settings, BACKGROUND_COLOR, FPS
+from src.instrumentation import Instrumentation
+from src.renderer import Renderer
+from src.replay import ReplayPlayer, ReplayReader, ReplayWriter
+from src.scheduler import PlanningScheduler
+from src.simulation import Simulator
+from src.spectator import SpectatorServer
+
+
 class Game:
     """Manages the autonomous snake game."""
-    def __init__(self):
-        """Initializes the Game object."""
-        global GRID_SIZE, WIDTH, HEIGHT, SNAKE_COLORS, NUM_SNAKES
-        GRID_SIZE = settings.grid_size
-        WIDTH = GRID_SIZE * CELL_SIZE
-        HEIGHT = GRID_SIZE * CELL_SIZE
-        SNAKE_COLORS = settings.selected_snake_colors
-        NUM_SNAKES = settings.num_snakes
-
+    def __init__(self, replay_path=None):
+        """Initializes the Game object, or a player for the replay file at replay_path."""
         pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.replay = ReplayReader(replay_path) if replay_path else None
+        self.recorder = None
+        self.recordings = 0
+        self._open_window()
         pygame.display.set_caption("Autonomous Snake Game")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        for i in range(GRID_SIZE):
-            self.grid[0][i] = 1
-            self.grid[GRID_SIZE-1][i] = 1
-            self.grid[i][0] = 1
-            self.grid[i][GRID_SIZE-1] = 1
-
-        self.snakes = []
-        start_positions = [(5, 5), (GRID_SIZE - 6, GRID_SIZE - 6), (5, GRID_SIZE - 6), (GRID_SIZE - 6, 5)]
-        selected_algorithms = settings.selected_algorithms
-        for i in range(NUM_SNAKES):
-            self.snakes.append(Snake(start_positions[i], SNAKE_COLORS[i], i, selected_algorithms[i]))
-
-        self.food_pos = generate_food(self.grid, self.snakes)
+        self.renderer = Renderer(self.screen, self._board_size())
+
+        self.scheduler = PlanningScheduler() if settings.concurrent_planning else None
+        self.simulator = ReplayPlayer(self.replay) if self.replay else Simulator(scheduler=self.scheduler)
+        self.spectators = SpectatorServer().start() if settings.spectator_port is not None and not self.replay else None
+        self.instrumentation = None
+        self.frame_time = 0.0
+        self.tick_accumulator = 0.0
         self.game_over = False
         self.paused = False
-        self.game_state = "MENU"
+        self.game_state = "PLAYING" if self.replay else "MENU"
         self.menu_option_index = 0
 
-    def reset(self):
-        """Resets the game to its initial state using current settings."""
-        global GRID_SIZE, WIDTH, HEIGHT, SNAKE_COLORS, NUM_SNAKES
-        GRID_SIZE = settings.grid_size
-        WIDTH = GRID_SIZE * CELL_SIZE
-        HEIGHT = GRID_SIZE * CELL_SIZE
-        SNAKE_COLORS = settings.selected_snake_colors
-        NUM_SNAKES = settings.num_snakes
-
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        for i in range(GRID_SIZE):
-            self.grid[0][i] = 1
-            self.grid[GRID_SIZE-1][i] = 1
-            self.grid[i][0] = 1
-            self.grid[i][GRID_SIZE-1] = 1
+    @property
+    def snakes(self):
+        return self.simulator.snakes
 
+    @property
+    def food_pos(self):
+        return self.simulator.food_pos
+
+    def reset(self):
+        """Resets the game to its initial state using current settings (or rewinds a replay)."""
+        self.tick_accumulator = 0.0
         self.game_over = False
         self.paused = False
         self.game_state = "PLAYING"
-        self.snakes = []
-        start_positions = [(5, 5), (GRID_SIZE - 6, GRID_SIZE - 6), (5, GRID_SIZE - 6), (GRID_SIZE - 6, 5)]
-        selected_algorithms = settings.selected_algorithms
-        for i in range(NUM_SNAKES):
-            self.snakes.append(Snake(start_positions[i], SNAKE_COLORS[i], i, selected_algorithms[i]))
-        self.food_pos = generate_food(self.grid, self.snakes)
+        if self.replay:
+            self._seek(0)
+            return
+        self._open_window()
+        self.renderer.set_screen(self.screen)
+        self._close_recorder()
+        self.simulator = Simulator(scheduler=self.scheduler)
+        if settings.replay_record_dir:
+            self.recorder = ReplayWriter(self._next_recording_path(), self.simulator)
+        if self.spectators:
+            self.spectators.publish(self.simulator)
+        if self.instrumentation:
+            self.instrumentation.attach(self.simulator)
+
+    def _board_size(self):
+        return self.replay.header["grid_size"] if self.replay else settings.grid_size
+
+    def _open_window(self):
+        """Sizes the window to the board, capped at settings.max_window_size."""
+        size = min(self._board_size() * settings.cell_size, settings.max_window_size)
+        self.width = self.height = size
+        self.screen = pygame.display.set_mode((size, size))
 
     def run(self):
         """Runs the main game loop."""
@@ -81,140 +91,282 @@ class Game:
                             self.paused = not self.paused
                         if event.key == pygame.K_r:
                             self.reset()
+                        if event.key == pygame.K_i and not self.replay:
+                            self._toggle_instrumentation()
+                        self._handle_seek_input(event.key)
+                        self._handle_speed_input(event.key)
+                        self._handle_camera_input(event.key)
                     elif self.game_state == "GAME_OVER":
                         if event.key == pygame.K_r:
-                            self.reset()
-                            self.game_state = "MENU"
+                            if self.replay:
+                                self.reset()
+                            else:
+                                self.game_state = "MENU"
+                        elif self.replay and event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                            self._handle_seek_input(event.key)
+                        else:
+                            self._handle_camera_input(event.key)
+                if event.type == pygame.MOUSEWHEEL and self.game_state in ("PLAYING", "GAME_OVER"):
+                    self.renderer.camera.zoom(1 if event.y > 0 else -1)
+                    self.renderer.invalidate()
 
             if self.game_state == "PLAYING" and not self.game_over and not self.paused:
-                food_eaten_by_any_snake = False
-                for snake in self.snakes:
-                    if snake.is_alive:
-                        food_eaten = snake.move(self.grid, self.food_pos, self.snakes)
-                        if food_eaten:
-                            food_eaten_by_any_snake = True
-
-                if food_eaten_by_any_snake:
-                    self.food_pos = generate_food(self.grid, self.snakes)
-
-                alive_snakes = sum(1 for snake in self.snakes if snake.is_alive)
-                if alive_snakes <= 1:
-                    self.game_over = True
-                    self.game_state = "GAME_OVER"
-
-            self.screen.fill(BACKGROUND_COLOR)
+                self._advance_simulation()
 
             if self.game_state == "MENU":
                 self._draw_start_menu()
+                pygame.display.flip()
+                self.renderer.invalidate()
             elif self.game_state in ("PLAYING", "GAME_OVER"):
-                draw_grid(self.screen)
-                draw_food(self.screen, self.food_pos)
-                for snake in self.snakes:
-                    if snake.is_alive:
-                        draw_snake(self.screen, snake)
-
-                for i, snake in enumerate(self.snakes):
-                    score_text = self.font.render(f"Snake {snake.id+1}: {snake.score}", True, snake.color)
-                    self.screen.blit(score_text, (10, 10 + i * 20))
-
-                if self.game_state == "GAME_OVER":
-                    self._draw_game_over_screen()
-                elif self.paused:
-                    pause_text = self.font.render("Paused (Space to Play, R to Reset)", True, (255, 255, 255))
-                    text_rect = pause_text.get_rect(center=(WIDTH // 2, HEIGHT - 30))
-                    self.screen.blit(pause_text, text_rect)
-                else:
-                    instruction_text = self.font.render("Space to Pause, R to Reset", True, (200, 200, 200))
-                    self.screen.blit(instruction_text, (10, HEIGHT - 30))
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
+                self.renderer.render(self.simulator, self._hud_items())
+
+            self.frame_time = self.clock.tick(FPS) / 1000
+
+        if self.instrumentation:
+            self.instrumentation.close()
+        if self.scheduler:
+            self.scheduler.close()
+        self._close_recorder()
+        if self.replay:
+            self.replay.close()
+        if self.spectators:
+            self.spectators.close()
+
+    def _advance_simulation(self):
+        """Runs the simulation ticks that fall into this frame.
+
+        Normally ticks follow settings.tick_rate from a fixed-timestep accumulator.
+        Catching up stops once the frame budget (settings.frame_tick_budget of a
+        frame) is spent or max_ticks_per_frame ticks have run, and the backlog is
+        dropped instead of spiralling, so slow ticks on a large board never hold
+        up input and redraws for more than one tick. Turbo mode runs as many ticks
+        as fit in the frame budget and only the latest state is rendered.
+        """
+        deadline = perf_counter() + settings.frame_tick_budget / FPS
+        if settings.turbo:
+            while perf_counter() < deadline and not self.game_over:
+                self._step_simulation()
+            self.tick_accumulator = 0.0
+            return
+
+        ticks = 0
+        tick_interval = 1 / settings.tick_rate
+        self.tick_accumulator += self.frame_time
+        while self.tick_accumulator >= tick_interval and not self.game_over:
+            self._step_simulation()
+            self.tick_accumulator -= tick_interval
+            ticks += 1
+            if ticks >= settings.max_ticks_per_frame or perf_counter() >= deadline:
+                self.tick_accumulator = min(self.tick_accumulator, tick_interval)
+                break
+
+    def _step_simulation(self):
+        stepper = self.recorder or self.simulator
+        game_over = stepper.step()
+        if self.spectators:
+            self.spectators.publish(self.simulator)
+        if game_over:
+            self.game_over = True
+            self.game_state = "GAME_OVER"
+            self._close_recorder()
+
+    def _next_recording_path(self):
+        """Returns a fresh file in settings.replay_record_dir for the game just started."""
+        os.makedirs(settings.replay_record_dir, exist_ok=True)
+        self.recordings += 1
+        name = f"replay-{self.simulator.seed}-{self.recordings}.replay"
+        return os.path.join(settings.replay_record_dir, name)
+
+    def _close_recorder(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def _seek(self, tick):
+        """Jumps the replay to a tick and repaints the board from scratch."""
+        self.simulator.seek(tick)
+        self.game_over = self.simulator.game_over
+        self.game_state = "GAME_OVER" if self.game_over else "PLAYING"
+        self.renderer.invalidate()
+
+    def _handle_seek_input(self, key):
+        """Seeks a replay: [ jumps back and ] forward by settings.replay_seek_step ticks."""
+        if not self.replay:
+            return
+        if key == pygame.K_LEFTBRACKET:
+            self._seek(self.simulator.tick - settings.replay_seek_step)
+        elif key == pygame.K_RIGHTBRACKET:
+            self._seek(self.simulator.tick + settings.replay_seek_step)
+
+    def _handle_speed_input(self, key):
+        """Changes the simulation speed: +/- step the tick rate, T toggles turbo."""
+        if key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            settings.selected_tick_rate_index = min(settings.selected_tick_rate_index + 1, len(settings.tick_rate_options) - 1)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            settings.selected_tick_rate_index = max(settings.selected_tick_rate_index - 1, 0)
+        elif key == pygame.K_t:
+            settings.turbo = not settings.turbo
+
+    def _handle_camera_input(self, key):
+        """Moves the camera: arrows pan, PageUp/PageDown zoom, Home fits the board."""
+        camera = self.renderer.camera
+        step = settings.camera_pan_step
+        if key == pygame.K_LEFT:
+            camera.pan(-step, 0)
+        elif key == pygame.K_RIGHT:
+            camera.pan(step, 0)
+        elif key == pygame.K_UP:
+            camera.pan(0, -step)
+        elif key == pygame.K_DOWN:
+            camera.pan(0, step)
+        elif key == pygame.K_PAGEUP:
+            camera.zoom(1)
+        elif key == pygame.K_PAGEDOWN:
+            camera.zoom(-1)
+        elif key == pygame.K_HOME:
+            camera.cell_size = camera.fit_zoom()
+            camera.x = camera.y = 0
+            camera.clamp()
+        else:
+            return
+        self.renderer.invalidate()
+
+    def _toggle_instrumentation(self):
+        """Turns the per-snake timing overlay (and trace file, if configured) on or off."""
+        if self.instrumentation:
+            self.instrumentation.close()
+            self.instrumentation = None
+        else:
+            self.instrumentation = Instrumentation(settings.instrumentation_trace_path)
+            self.instrumentation.attach(self.simulator)
+
+    def _hud_items(self):
+        """Returns the text drawn over the board as (text, size, color, (anchor, point))."""
+        items = []
+        for i, snake in enumerate(self._listed_snakes()):
+            items.append((f"Snake {snake.id+1}: {snake.score}", 24, snake.color, ("topleft", (10, 10 + i * 20))))
+
+        speed_text = "Speed: TURBO" if settings.turbo else f"Speed: {settings.tick_rate} ticks/s"
+        items.append((speed_text, 24, (200, 200, 200), ("bottomright", (self.width - 10, self.height - 10))))
+
+        if self.instrumentation:
+            items.extend(self._instrumentation_overlay_items())
+
+        if self.replay:
+            replay_text = f"Replay: tick {self.simulator.tick}/{self.replay.tick_count} ([ ] to seek)"
+            items.append((replay_text, 24, (200, 200, 200), ("midtop", (self.width // 2, 10))))
+
+        if self.game_state == "GAME_OVER":
+            items.extend(self._game_over_items())
+        elif self.paused:
+            items.append(("Paused (Space to Play, R to Reset)", 24, (255, 255, 255), ("center", (self.width // 2, self.height - 30))))
+        else:
+            items.append(("Space: Pause, R: Reset, I: Stats, +/-/T: Speed", 24, (200, 200, 200), ("topleft", (10, self.height - 30))))
+        return items
+
+    def _listed_snakes(self):
+        """Returns the snakes shown in score lists: all of them, or the top scorers if there are many."""
+        snakes = self.snakes
+        if len(snakes) <= settings.hud_max_snakes:
+            return snakes
+        ranked = sorted(snakes, key=lambda snake: (not snake.is_alive, -snake.score, snake.id))
+        return ranked[:settings.hud_max_snakes]
+
+    def _instrumentation_overlay_items(self):
+        """Lists the last tick's per-snake search timings and counters."""
+        last_tick = self.instrumentation.last_tick
+        if not last_tick:
+            return []
+        lines = [f"Tick {last_tick['tick']}: {last_tick['tick_time'] * 1000:.2f} ms"]
+        for snake_id, record in sorted(last_tick["snakes"].items())[:settings.hud_max_snakes]:
+            lines.append(
+                f"S{snake_id + 1} {record['algorithm']}: {record['search'] * 1000:.2f} ms, "
+                f"{record['nodes_expanded']} nodes, len {record['path_length']}"
+            )
+        return [(line, 24, (200, 200, 200), ("topright", (self.width - 10, 10 + i * 20))) for i, line in enumerate(lines)]
 
     def _draw_start_menu(self):
         """Draws a simpler vertical start menu layout."""
         self.screen.fill(BACKGROUND_COLOR)
 
-        title_font = pygame.font.Font(None, 50)
-        menu_font = pygame.font.Font(None, 28)
-
         grid_size_names = list(settings.grid_sizes.keys())
         current_grid_size_name = settings.selected_grid_size_name
         algorithm_names = settings.pathfinding_algorithms
         current_algorithm_indices = settings.selected_algorithm_indices
 
-        title_text = title_font.render("Autonomous Snake Game", True, (255, 255, 255))
-        title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 6))
+        title_text = self.renderer.text("Autonomous Snake Game", 50, (255, 255, 255))
+        title_rect = title_text.get_rect(center=(self.width // 2, self.height // 6))
         self.screen.blit(title_text, title_rect)
 
-        menu_y_start = HEIGHT // 3
+        menu_y_start = self.height // 4
         line_height = 30
 
         color = (255, 255, 255) if self.menu_option_index == 0 else (200, 200, 200)
         grid_text = f"Grid Size: [{current_grid_size_name}] < >"
-        grid_text_surface = menu_font.render(grid_text, True, color)
-        grid_text_rect = grid_text_surface.get_rect(center=(WIDTH // 2, menu_y_start))
+        grid_text_surface = self.renderer.text(grid_text, 28, color)
+        grid_text_rect = grid_text_surface.get_rect(center=(self.width // 2, menu_y_start))
         self.screen.blit(grid_text_surface, grid_text_rect)
 
         color = (255, 255, 255) if self.menu_option_index == 1 else (200, 200, 200)
-        algorithms_text_surface = menu_font.render("Algorithms:", True, color)
+        snakes_text_surface = self.renderer.text(f"Snakes: [{settings.num_snakes}] < >", 28, color)
+        snakes_text_rect = snakes_text_surface.get_rect(center=(self.width // 2, menu_y_start + line_height))
+        self.screen.blit(snakes_text_surface, snakes_text_rect)
+
+        num_assignments = len(current_algorithm_indices)
+        color = (255, 255, 255) if self.menu_option_index == 2 else (200, 200, 200)
+        algorithms_text = "Algorithms:"
+        if settings.num_snakes > num_assignments:
+            algorithms_text = f"Algorithms (repeat every {num_assignments}):"
+        algorithms_text_surface = self.renderer.text(algorithms_text, 28, color)
         algorithms_text_rect = algorithms_text_surface.get_rect(
-            center=(WIDTH // 2, menu_y_start + line_height)
+            center=(self.width // 2, menu_y_start + line_height * 2)
         )
         self.screen.blit(algorithms_text_surface, algorithms_text_rect)
 
-        for snake_index in range(NUM_SNAKES):
+        for snake_index in range(num_assignments):
             snake_color = (255, 255, 255) if (
-                self.menu_option_index == 1 and
+                self.menu_option_index == 2 and
                 settings.menu_snake_algorithm_index == snake_index
             ) else (200, 200, 200)
 
             snake_text = f"Snake {snake_index + 1}: [{algorithm_names[current_algorithm_indices[snake_index]]}]"
-            snake_text_surface = menu_font.render(snake_text, True, snake_color)
+            snake_text_surface = self.renderer.text(snake_text, 28, snake_color)
 
             snake_text_rect = snake_text_surface.get_rect(
-                center=(WIDTH // 2, menu_y_start + line_height * (2 + snake_index))
+                center=(self.width // 2, menu_y_start + line_height * (3 + snake_index))
             )
             self.screen.blit(snake_text_surface, snake_text_rect)
 
-        color = (255, 255, 255) if self.menu_option_index == 2 else (200, 200, 200)
-        start_text_surface = menu_font.render("Start Game", True, color)
+        color = (255, 255, 255) if self.menu_option_index == 3 else (200, 200, 200)
+        start_text_surface = self.renderer.text("Start Game", 28, color)
         start_text_rect = start_text_surface.get_rect(
-            center=(WIDTH // 2, menu_y_start + line_height * (2 + NUM_SNAKES))
+            center=(self.width // 2, menu_y_start + line_height * (3 + num_assignments))
         )
         self.screen.blit(start_text_surface, start_text_rect)
 
-    def _draw_game_over_screen(self):
-        """Draws the game over screen with scores."""
-        game_over_font = pygame.font.Font(None, 80)
-        prompt_font = pygame.font.Font(None, 30)
-
-        game_over_text = game_over_font.render("Game Over!", True, (255, 255, 255))
-        game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 3 - 30))
-        self.screen.blit(game_over_text, game_over_rect)
-
-        score_y_pos = HEIGHT // 2
-        for i, snake in enumerate(self.snakes):
-            score_text = self.font.render(f"Snake {snake.id+1} Score: {snake.score}", True, snake.color)
-            score_rect = score_text.get_rect(center=(WIDTH // 2, score_y_pos + i * 30))
-            self.screen.blit(score_text, score_rect)
-
-        restart_prompt_text = prompt_font.render("Press R to Restart to Menu", True, (200, 200, 200))
-        restart_prompt_rect = restart_prompt_text.get_rect(center=(WIDTH // 2, HEIGHT - 50))
-        self.screen.blit(restart_prompt_text, restart_prompt_rect)
+    def _game_over_items(self):
+        """Lists the game over text with scores."""
+        items = [("Game Over!", 80, (255, 255, 255), ("center", (self.width // 2, self.height // 3 - 30)))]
+        score_y_pos = self.height // 2
+        for i, snake in enumerate(self._listed_snakes()):
+            items.append((f"Snake {snake.id+1} Score: {snake.score}", 24, snake.color, ("center", (self.width // 2, score_y_pos + i * 30))))
+        restart_text = "Press R to Watch Again" if self.replay else "Press R to Restart to Menu"
+        items.append((restart_text, 30, (200, 200, 200), ("center", (self.width // 2, self.height - 50))))
+        return items
 
     def _handle_menu_input(self, key):
         """Handles key presses in the start menu."""
         if key == pygame.K_DOWN:
-            self.menu_option_index = (self.menu_option_index + 1) % 3
-            if self.menu_option_index == 1:
+            self.menu_option_index = (self.menu_option_index + 1) % 4
+            if self.menu_option_index == 2:
                 settings.menu_snake_algorithm_index = 0
 
         elif key == pygame.K_UP:
-            self.menu_option_index = (self.menu_option_index - 1) % 3
-            if self.menu_option_index == 1:
+            self.menu_option_index = (self.menu_option_index - 1) % 4
+            if self.menu_option_index == 2:
                 settings.menu_snake_algorithm_index = 0
 
-        elif self.menu_option_index == 1:
+        elif self.menu_option_index == 2:
             if key == pygame.K_1:
                 settings.menu_snake_algorithm_index = 0
             elif key == pygame.K_2:
@@ -230,7 +382,7 @@ class Game:
             self._adjust_menu_option(key, None)
 
         elif key == pygame.K_SPACE or key == pygame.K_RETURN:
-            if self.menu_option_index == 2:
+            if self.menu_option_index == 3:
                 self.game_state = "STARTING_GAME"
 
     def _adjust_menu_option(self, key, snake_index):
@@ -244,6 +396,11 @@ class Game:
                 settings.selected_grid_size_name = grid_size_names[(current_index - 1) % len(grid_size_names)]
 
         elif self.menu_option_index == 1:
+            count = len(settings.num_snakes_options)
+            step = 1 if key == pygame.K_RIGHT else -1
+            settings.selected_num_snakes_index = (settings.selected_num_snakes_index + step) % count
+
+        elif self.menu_option_index == 2:
             if snake_index is not None:
                 algorithm_names = settings.pathfinding_algorithms
                 if key == pygame.K_RIGHT:
@@ -255,5 +412,5 @@ class Game:
                         settings.selected_algorithm_indices[snake_index] - 1
                     ) % len(algorithm_names)
 
-        elif self.menu_option_index == 2:
+        elif self.menu_option_index == 3:
             pass
@@ -0,0 +1,208 @@
+import json
+from time import perf_counter
+from src.pathfinding import get_workspace
+
+SNAKE_PHASES = ("search", "survival_move", "collision")
+BOARD_PHASES = ("field_build", "food_spawn", "batch_search", "scheduled_search", "collisions")
+
+
+class Instrumentation:
+    """Opt-in per-tick timings and search counters for a Simulator.
+
+    attach() shadows the hot-path methods of the simulator and its snakes with
+    timed wrappers on the instances themselves, so an uninstrumented simulator
+    runs exactly the original code with no extra checks.
+    """
+
+    def __init__(self, trace_path=None):
+        """Initializes the recorder, optionally appending one JSON line per tick to trace_path."""
+        self.trace = open(trace_path, "a") if trace_path else None
+        self.simulator = None
+        self.totals = {}
+        self.board_totals = {phase: 0.0 for phase in BOARD_PHASES}
+        self.ticks = 0
+        self.max_tick_time = 0.0
+        self.current = None
+        self.last_tick = None
+
+    def attach(self, simulator):
+        """Instruments a simulator and its current snakes (re-instruments after reset)."""
+        if self.simulator is not None and self.simulator is not simulator:
+            self.detach()
+        self.simulator = simulator
+        simulator.instrumentation = self
+        simulator.step = self._timed_step(type(simulator).step.__get__(simulator))
+        simulator.reset = self._timed_reset(type(simulator).reset.__get__(simulator))
+        simulator._spawn_food = self._timed_board_phase("food_spawn", type(simulator)._spawn_food.__get__(simulator))
+        simulator._batch_paths = self._timed_board_phase("batch_search", type(simulator)._batch_paths.__get__(simulator))
+        simulator._scheduled_paths = self._timed_scheduled_search(
+            self._timed_board_phase("scheduled_search", type(simulator)._scheduled_paths.__get__(simulator)))
+        simulator._resolve_moves = self._timed_board_phase("collisions", type(simulator)._resolve_moves.__get__(simulator))
+        self._instrument_board(simulator)
+
+    def detach(self):
+        """Removes every wrapper installed by attach()."""
+        simulator = self.simulator
+        if simulator is None:
+            return
+        for name in ("step", "reset", "_spawn_food", "_batch_paths", "_scheduled_paths", "_resolve_moves"):
+            simulator.__dict__.pop(name, None)
+        if simulator.food_field is not None:
+            simulator.food_field.__dict__.pop("build", None)
+        for snake in simulator.snakes:
+            for name in ("_find_path_to_food", "_survival_move", "_check_collisions_and_food"):
+                snake.__dict__.pop(name, None)
+        simulator.instrumentation = None
+        self.simulator = None
+
+    def close(self):
+        """Detaches from the simulator and closes the trace file."""
+        self.detach()
+        if self.trace:
+            self.trace.close()
+            self.trace = None
+
+    def _instrument_board(self, simulator):
+        field = simulator.food_field
+        if field is not None:
+            field.build = self._timed_board_phase("field_build", type(field).build.__get__(field))
+        for snake in simulator.snakes:
+            snake._find_path_to_food = self._timed_search(snake, type(snake)._find_path_to_food.__get__(snake))
+            snake._survival_move = self._timed_snake_phase(snake, "survival_move", type(snake)._survival_move.__get__(snake))
+            snake._check_collisions_and_food = self._timed_snake_phase(
+                snake, "collision", type(snake)._check_collisions_and_food.__get__(snake))
+
+    def _snake_record(self, snake):
+        snakes = self.current["snakes"]
+        record = snakes.get(snake.id)
+        if record is None:
+            record = snakes[snake.id] = {
+                "algorithm": snake.algorithm_name,
+                "search": 0.0,
+                "survival_move": 0.0,
+                "collision": 0.0,
+                "nodes_expanded": 0,
+                "heap_pushes": 0,
+                "path_length": 0,
+            }
+        return record
+
+    def _timed_step(self, step):
+        def timed_step():
+            self.current = {"tick": self.simulator.tick, "snakes": {}, **{phase: 0.0 for phase in BOARD_PHASES}}
+            started = perf_counter()
+            result = step()
+            self.current["tick_time"] = perf_counter() - started
+            self._finish_tick()
+            return result
+        return timed_step
+
+    def _timed_reset(self, reset):
+        def timed_reset():
+            reset()
+            self._instrument_board(self.simulator)
+        return timed_reset
+
+    def _timed_board_phase(self, phase, method):
+        def timed(*args):
+            started = perf_counter()
+            result = method(*args)
+            if self.current is not None:
+                self.current[phase] += perf_counter() - started
+            return result
+        return timed
+
+    def _timed_snake_phase(self, snake, phase, method):
+        def timed(*args):
+            started = perf_counter()
+            result = method(*args)
+            if self.current is not None:
+                self._snake_record(snake)[phase] += perf_counter() - started
+            return result
+        return timed
+
+    def _timed_search(self, snake, method):
+        def timed(occupancy, food_pos, field=None):
+            planner = snake.planner
+            expanded_before = planner.expanded if planner is not None else 0
+            pushes_before = planner.pushes if planner is not None else 0
+            started = perf_counter()
+            path = method(occupancy, food_pos, field)
+            elapsed = perf_counter() - started
+            if self.current is None:
+                return path
+            record = self._snake_record(snake)
+            record["search"] += elapsed
+            if field is None:
+                if planner is not None:
+                    record["nodes_expanded"] += planner.expanded - expanded_before
+                    record["heap_pushes"] += planner.pushes - pushes_before
+                elif snake.backend == "python":
+                    workspace = get_workspace(occupancy.width, occupancy.height)
+                    record["nodes_expanded"] += workspace.expanded
+                    record["heap_pushes"] += workspace.pushes
+            record["path_length"] = len(path) - 1 if path else 0
+            return path
+        return timed
+
+    def _timed_scheduled_search(self, method):
+        """Credits each scheduled query's time and search counters to its snake."""
+        def timed(snakes):
+            paths = method(snakes)
+            if self.current is None:
+                return paths
+            searches = self.simulator.scheduler.last_searches
+            for snake in snakes:
+                elapsed, expanded, pushes = searches[snake.id]
+                record = self._snake_record(snake)
+                record["search"] += elapsed
+                record["nodes_expanded"] += expanded
+                record["heap_pushes"] += pushes
+                path = paths.get(snake.id)
+                record["path_length"] = len(path) - 1 if path else 0
+            return paths
+        return timed
+
+    def _finish_tick(self):
+        current = self.current
+        self.ticks += 1
+        self.max_tick_time = max(self.max_tick_time, current["tick_time"])
+        for phase in BOARD_PHASES:
+            self.board_totals[phase] += current[phase]
+        for snake_id, record in current["snakes"].items():
+            totals = self.totals.setdefault(snake_id, {
+                "algorithm": record["algorithm"], "ticks": 0, "max_search": 0.0, "path_length_sum": 0,
+                **{phase: 0.0 for phase in SNAKE_PHASES}, "nodes_expanded": 0, "heap_pushes": 0,
+            })
+            totals["ticks"] += 1
+            totals["max_search"] = max(totals["max_search"], record["search"])
+            totals["path_length_sum"] += record["path_length"]
+            for key in SNAKE_PHASES + ("nodes_expanded", "heap_pushes"):
+                totals[key] += record[key]
+        if self.trace:
+            self.trace.write(json.dumps(current) + "\n")
+        self.last_tick = current
+        self.current = None
+
+    def stats(self):
+        """Returns cumulative per-snake and board-level statistics."""
+        snakes = {}
+        for snake_id, totals in sorted(self.totals.items()):
+            ticks = totals["ticks"] or 1
+            snakes[snake_id] = {
+                "algorithm": totals["algorithm"],
+                "ticks": totals["ticks"],
+                **{f"{phase}_total": totals[phase] for phase in SNAKE_PHASES},
+                **{f"{phase}_mean": totals[phase] / ticks for phase in SNAKE_PHASES},
+                "search_max": totals["max_search"],
+                "nodes_expanded": totals["nodes_expanded"],
+                "nodes_expanded_mean": totals["nodes_expanded"] / ticks,
+                "heap_pushes": totals["heap_pushes"],
+                "path_length_mean": totals["path_length_sum"] / ticks,
+            }
+        return {
+            "ticks": self.ticks,
+            "max_tick_time": self.max_tick_time,
+            "board": dict(self.board_totals),
+            "snakes": snakes,
+        }
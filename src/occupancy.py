@@ -0,0 +1,137 @@
+from array import array
+
+WALL = 255
+MAX_CHANGE_LOG = 1 << 16
+
+
+class OccupancyGrid:
+    """Flat occupancy buffer of walls and snake segments, indexed by y * width + x.
+
+    Free cells are also kept in a swap-remove index (free plus each cell's slot in
+    it), so a uniformly random free cell can be drawn in O(1).
+    """
+
+    def __init__(self, width, height=None):
+        """Initializes an empty (all free) grid."""
+        self.width = width
+        self.height = height if height is not None else width
+        size = self.width * self.height
+        self.cells = bytearray(size)
+        self.free = array('i', range(size))
+        self.slot = array('i', range(size))
+        self.changes = []
+        self.change_base = 0
+
+    @classmethod
+    def walled(cls, width, height=None):
+        """Creates a grid whose border cells are walls."""
+        occupancy = cls(width, height)
+        w, h = occupancy.width, occupancy.height
+        for x in range(w):
+            occupancy.add_wall(x)
+            occupancy.add_wall((h - 1) * w + x)
+        for y in range(h):
+            occupancy.add_wall(y * w)
+            occupancy.add_wall(y * w + w - 1)
+        return occupancy
+
+    @classmethod
+    def from_grid(cls, grid, obstacles=()):
+        """Builds an occupancy grid from a nested wall grid and a set of obstacle positions."""
+        occupancy = cls(len(grid[0]), len(grid))
+        w = occupancy.width
+        for y, row in enumerate(grid):
+            for x, value in enumerate(row):
+                if value != 0:
+                    occupancy.add_wall(y * w + x)
+        for pos in obstacles:
+            if occupancy.in_bounds(pos) and occupancy.cells[pos[1] * w + pos[0]] != WALL:
+                occupancy.occupy(pos)
+        return occupancy
+
+    @classmethod
+    def from_cells(cls, width, height, cells):
+        """Builds an occupancy grid over a copy of an existing flat cell buffer."""
+        occupancy = cls(width, height)
+        occupancy.cells[:] = cells
+        occupancy.free = array('i', (i for i, value in enumerate(occupancy.cells) if value == 0))
+        occupancy.slot = array('i', [-1]) * len(occupancy.cells)
+        for slot, index in enumerate(occupancy.free):
+            occupancy.slot[index] = slot
+        return occupancy
+
+    def add_wall(self, index):
+        """Turns a free cell into a permanent wall."""
+        if self.cells[index] == 0:
+            self._remove_free(index)
+            self.cells[index] = WALL
+
+    def index(self, pos):
+        return pos[1] * self.width + pos[0]
+
+    def position(self, index):
+        return (index % self.width, index // self.width)
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def is_free(self, pos):
+        """Checks if a position is inside the grid and holds no wall or snake segment."""
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height and self.cells[pos[1] * self.width + pos[0]] == 0
+
+    @property
+    def version(self):
+        """Monotonic counter of free/occupied transitions, usable with changes_since."""
+        return self.change_base + len(self.changes)
+
+    def changes_since(self, version):
+        """Returns the flat indices that flipped free/occupied since version, or None if trimmed."""
+        offset = version - self.change_base
+        if offset < 0:
+            return None
+        return self.changes[offset:]
+
+    def random_free_cell(self, rng):
+        """Returns a uniformly random free position, or None when the board is full."""
+        free = self.free
+        if not free:
+            return None
+        return self.position(free[rng.randrange(len(free))])
+
+    def _remove_free(self, index):
+        free, slot = self.free, self.slot
+        position = slot[index]
+        last = free[-1]
+        free[position] = last
+        slot[last] = position
+        free.pop()
+        slot[index] = -1
+
+    def _add_free(self, index):
+        self.slot[index] = len(self.free)
+        self.free.append(index)
+
+    def _log_change(self, index):
+        self.changes.append(index)
+        if len(self.changes) > MAX_CHANGE_LOG:
+            half = MAX_CHANGE_LOG // 2
+            del self.changes[:half]
+            self.change_base += half
+
+    def occupy(self, pos):
+        """Adds one snake segment to a cell."""
+        index = pos[1] * self.width + pos[0]
+        count = self.cells[index]
+        self.cells[index] = count + 1
+        if count == 0:
+            self._remove_free(index)
+            self._log_change(index)
+
+    def release(self, pos):
+        """Removes one snake segment from a cell."""
+        index = pos[1] * self.width + pos[0]
+        count = self.cells[index] - 1
+        self.cells[index] = count
+        if count == 0:
+            self._add_free(index)
+            self._log_change(index)
@@ -1,92 +1,484 @@
 import heapq
-from src.utils import is_valid_pos
+from array import array
+from collections import deque
+from time import perf_counter
+from src.occupancy import OccupancyGrid
 
+CHECKPOINT_INTERVAL = 64
 
-def dijkstra(grid, start, end, snake_bodies_obstacles):
-    """Finds the shortest path using Dijkstra's algorithm."""
-    distances = {(r, c): float('inf') for r in range(len(grid)) for c in range(len(grid[0]))}
-    previous_nodes = {(r, c): None for r in range(len(grid)) for c in range(len(grid[0]))}
-    distances[start] = 0
-    priority_queue = [(0, start)]
+_BLOCKED = bytes([0] + [1] * 255)
 
-    while priority_queue:
-        current_distance, current_pos = heapq.heappop(priority_queue)
 
-        if current_distance > distances[current_pos]:
-            continue
+class SearchWorkspace:
+    """Preallocated flat search buffers for one grid size, reused across planner calls.
 
-        if current_pos == end:
-            path = []
-            while current_pos is not None:
-                path.append(current_pos)
-                current_pos = previous_nodes[current_pos]
-            return path[::-1]
+    Entries are only meaningful where stamp[i] equals the current generation, so
+    starting a new search costs O(1) instead of clearing O(width * height) cells.
 
-        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            neighbor_pos = (current_pos[0] + dc, current_pos[1] + dr)
+    A search can be bounded by a node budget and/or a perf_counter deadline. The
+    loops only compare the expansion count against a precomputed checkpoint and
+    call _checkpoint when it is reached, so unbounded searches pay one integer
+    comparison per expansion. A search cut short returns None with truncated set.
+    """
 
-            if is_valid_pos(neighbor_pos) and grid[neighbor_pos[1]][neighbor_pos[0]] == 0 and neighbor_pos not in snake_bodies_obstacles:
-                distance = current_distance + 1
-                if distance < distances[neighbor_pos]:
-                    distances[neighbor_pos] = distance
-                    previous_nodes[neighbor_pos] = current_pos
-                    heapq.heappush(priority_queue, (distance, neighbor_pos))
+    def __init__(self, width, height):
+        """Allocates the distance, parent and stamp arrays for a width x height grid."""
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.distance = array('i', [0]) * self.size
+        self.parent = array('i', [-1]) * self.size
+        self.stamp = array('I', [0]) * self.size
+        self.generation = 0
+        self.expanded = 0
+        self.pushes = 0
+        self.budget = None
+        self.deadline = None
+        self.truncated = False
 
-    return None
+    def _next_generation(self):
+        """Invalidates every entry from the previous search."""
+        self.generation += 1
+        if self.generation > 0xFFFFFFFF:
+            self.stamp = array('I', [0]) * self.size
+            self.generation = 1
+        return self.generation
 
+    def _first_checkpoint(self):
+        """Returns the expansion count at which a new search first checks its bounds."""
+        if self.budget is None and self.deadline is None:
+            return self.size + 1
+        if self.budget is None:
+            return CHECKPOINT_INTERVAL
+        return min(self.budget, CHECKPOINT_INTERVAL)
 
-def astar(grid, start, end, snake_bodies_obstacles):
-    """Finds the shortest path using A* algorithm."""
-    distances = {(r, c): float('inf') for r in range(len(grid)) for c in range(len(grid[0]))}
-    previous_nodes = {(r, c): None for r in range(len(grid)) for c in range(len(grid[0]))}
-    distances[start] = 0
-    priority_queue = [(0, start)]
+    def _checkpoint(self, expanded):
+        """Returns the next checkpoint, or -1 (marking the search truncated) when out of bounds."""
+        if (self.budget is not None and expanded >= self.budget or
+                self.deadline is not None and perf_counter() >= self.deadline):
+            self.truncated = True
+            return -1
+        checkpoint = expanded + CHECKPOINT_INTERVAL
+        return checkpoint if self.budget is None else min(checkpoint, self.budget)
 
-    def heuristic(pos):
-        return abs(pos[0] - end[0]) + abs(pos[1] - end[1])
+    def _neighbors(self, index):
+        """Returns the in-bounds 4-neighbors of a flat index (-1 marks a missing one)."""
+        w = self.width
+        x = index % w
+        return (
+            index + 1 if x < w - 1 else -1,
+            index - 1 if x > 0 else -1,
+            index + w if index + w < self.size else -1,
+            index - w,
+        )
 
-    while priority_queue:
-        current_f_score, current_pos = heapq.heappop(priority_queue)
+    def _path(self, end_index):
+        """Rebuilds the start-to-end path by following parent links."""
+        w = self.width
+        parent = self.parent
+        path = []
+        index = end_index
+        while index != -1:
+            path.append((index % w, index // w))
+            index = parent[index]
+        return path[::-1]
 
-        if current_pos == end:
-            path = []
-            while current_pos is not None:
-                path.append(current_pos)
-                current_pos = previous_nodes[current_pos]
-            return path[::-1]
+    def _begin(self, occupancy, start, end):
+        """Seeds a new search; returns (start_index, end_index, generation) or None if out of bounds."""
+        self.expanded = self.pushes = 0
+        self.truncated = False
+        if not (occupancy.in_bounds(start) and occupancy.in_bounds(end)):
+            return None
+        generation = self._next_generation()
+        start_index = occupancy.index(start)
+        self.stamp[start_index] = generation
+        self.distance[start_index] = 0
+        self.parent[start_index] = -1
+        return start_index, occupancy.index(end), generation
 
-        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            neighbor_pos = (current_pos[0] + dc, current_pos[1] + dr)
+    def bfs(self, occupancy, start, end):
+        """Breadth-first search with a deque, checking the goal on discovery."""
+        seeded = self._begin(occupancy, start, end)
+        if seeded is None:
+            return None
+        start_index, end_index, generation = seeded
+        if start_index == end_index:
+            return [start]
+        cells, stamp, parent = occupancy.cells, self.stamp, self.parent
+        neighbors = self._neighbors
+        queue = deque([start_index])
+        expanded = pushes = 0
+        checkpoint = self._first_checkpoint()
 
-            if is_valid_pos(neighbor_pos) and grid[neighbor_pos[1]][neighbor_pos[0]] == 0 and neighbor_pos not in snake_bodies_obstacles:
-                distance = distances[current_pos] + 1
-                if distance < distances[neighbor_pos]:
-                    distances[neighbor_pos] = distance
-                    previous_nodes[neighbor_pos] = current_pos
-                    f_score = distance + heuristic(neighbor_pos)
-                    heapq.heappush(priority_queue, (f_score, neighbor_pos))
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            if expanded >= checkpoint:
+                checkpoint = self._checkpoint(expanded)
+                if checkpoint < 0:
+                    break
+            for neighbor in neighbors(current):
+                if neighbor < 0 or stamp[neighbor] == generation or cells[neighbor]:
+                    continue
+                stamp[neighbor] = generation
+                parent[neighbor] = current
+                if neighbor == end_index:
+                    self.expanded, self.pushes = expanded, pushes
+                    return self._path(end_index)
+                queue.append(neighbor)
+                pushes += 1
+        self.expanded, self.pushes = expanded, pushes
+        return None
 
-    return None
+    def dijkstra(self, occupancy, start, end):
+        """Dijkstra's algorithm over unit edge costs using a bucket queue (Dial's algorithm)."""
+        seeded = self._begin(occupancy, start, end)
+        if seeded is None:
+            return None
+        start_index, end_index, generation = seeded
+        cells, stamp, parent, distance = occupancy.cells, self.stamp, self.parent, self.distance
+        neighbors = self._neighbors
+        bucket = [start_index]
+        current_distance = 0
+        expanded = pushes = 0
+        checkpoint = self._first_checkpoint()
 
+        while bucket and checkpoint >= 0:
+            next_bucket = []
+            next_distance = current_distance + 1
+            for current in bucket:
+                if distance[current] != current_distance:
+                    continue
+                expanded += 1
+                if current == end_index:
+                    self.expanded, self.pushes = expanded, pushes
+                    return self._path(end_index)
+                if expanded >= checkpoint:
+                    checkpoint = self._checkpoint(expanded)
+                    if checkpoint < 0:
+                        break
+                for neighbor in neighbors(current):
+                    if neighbor < 0 or cells[neighbor]:
+                        continue
+                    if stamp[neighbor] != generation or next_distance < distance[neighbor]:
+                        stamp[neighbor] = generation
+                        distance[neighbor] = next_distance
+                        parent[neighbor] = current
+                        next_bucket.append(neighbor)
+                        pushes += 1
+            bucket = next_bucket
+            current_distance = next_distance
+        self.expanded, self.pushes = expanded, pushes
+        return None
 
-def bfs(grid, start, end, snake_bodies_obstacles):
-    """Finds the shortest path using BFS algorithm."""
-    queue = [(start, [start])]
-    visited = {start}
+    def astar(self, occupancy, start, end):
+        """A* with a Manhattan heuristic and a binary heap of flat indices."""
+        seeded = self._begin(occupancy, start, end)
+        if seeded is None:
+            return None
+        start_index, end_index, generation = seeded
+        cells, stamp, parent, distance = occupancy.cells, self.stamp, self.parent, self.distance
+        neighbors = self._neighbors
+        w = self.width
+        end_x, end_y = end
+        priority_queue = [(abs(start[0] - end_x) + abs(start[1] - end_y), start_index)]
+        expanded = pushes = 0
+        checkpoint = self._first_checkpoint()
+
+        while priority_queue:
+            current_f_score, current = heapq.heappop(priority_queue)
+            if current == end_index:
+                self.expanded, self.pushes = expanded + 1, pushes
+                return self._path(end_index)
+            current_distance = distance[current]
+            if current_f_score > current_distance + abs(current % w - end_x) + abs(current // w - end_y):
+                continue
+            expanded += 1
+            if expanded >= checkpoint:
+                checkpoint = self._checkpoint(expanded)
+                if checkpoint < 0:
+                    break
+
+            tentative = current_distance + 1
+            for neighbor in neighbors(current):
+                if neighbor < 0 or cells[neighbor]:
+                    continue
+                if stamp[neighbor] != generation or tentative < distance[neighbor]:
+                    stamp[neighbor] = generation
+                    distance[neighbor] = tentative
+                    parent[neighbor] = current
+                    f_score = tentative + abs(neighbor % w - end_x) + abs(neighbor // w - end_y)
+                    heapq.heappush(priority_queue, (f_score, neighbor))
+                    pushes += 1
+        self.expanded, self.pushes = expanded, pushes
+        return None
+
+    def jps(self, occupancy, start, end):
+        """Jump Point Search for a 4-connected grid, expanding only jump points.
+
+        Follows the never-diagonal variant of pathfinding.js: horizontal scans stop
+        at cells with a forced vertical neighbor, vertical scans also stop where a
+        horizontal scan would find a jump point. Jumps are iterative loops, and the
+        returned path is the jump points joined by their straight segments.
+        """
+        seeded = self._begin(occupancy, start, end)
+        if seeded is None:
+            return None
+        start_index, end_index, generation = seeded
+        if start_index == end_index:
+            return [start]
+        mask = occupancy.cells.translate(_BLOCKED)
+        stamp, parent, distance = self.stamp, self.parent, self.distance
+        w = self.width
+        end_x, end_y = end
+        priority_queue = [(abs(start[0] - end_x) + abs(start[1] - end_y), start_index)]
+        expanded = pushes = 0
+        checkpoint = self._first_checkpoint()
+
+        while priority_queue:
+            current_f_score, current = heapq.heappop(priority_queue)
+            if current == end_index:
+                self.expanded, self.pushes = expanded + 1, pushes
+                return self._jump_path(end_index)
+            current_distance = distance[current]
+            x, y = current % w, current // w
+            if current_f_score > current_distance + abs(x - end_x) + abs(y - end_y):
+                continue
+            expanded += 1
+            if expanded >= checkpoint:
+                checkpoint = self._checkpoint(expanded)
+                if checkpoint < 0:
+                    break
+
+            for dx, dy in self._jump_directions(current, x, y):
+                if dx:
+                    jump_point = self._jump_horizontal(mask, x, y, dx, end_index)
+                else:
+                    jump_point = self._jump_vertical(mask, x, y, dy, end_index)
+                if jump_point < 0:
+                    continue
+                tentative = current_distance + abs(jump_point % w - x) + abs(jump_point // w - y)
+                if stamp[jump_point] != generation or tentative < distance[jump_point]:
+                    stamp[jump_point] = generation
+                    distance[jump_point] = tentative
+                    parent[jump_point] = current
+                    f_score = tentative + abs(jump_point % w - end_x) + abs(jump_point // w - end_y)
+                    heapq.heappush(priority_queue, (f_score, jump_point))
+                    pushes += 1
+        self.expanded, self.pushes = expanded, pushes
+        return None
+
+    def _jump_directions(self, index, x, y):
+        """Returns the pruned search directions at a jump point given how it was reached."""
+        parent = self.parent[index]
+        if parent < 0:
+            return ((1, 0), (-1, 0), (0, 1), (0, -1))
+        w = self.width
+        if parent // w == y:
+            dx = 1 if x > parent % w else -1
+            return ((dx, 0), (0, 1), (0, -1))
+        dy = 1 if y > parent // w else -1
+        return ((0, dy), (1, 0), (-1, 0))
+
+    def _jump_horizontal(self, mask, x, y, dx, end_index):
+        """Scans along a row from (x, y); returns the first jump point index or -1.
+
+        mask holds 1 for blocked cells and 0 for free ones, so the nearest wall and
+        the nearest forced neighbor (a blocked-to-free step in the row above or
+        below) are found with bytes.find/rfind instead of a Python loop.
+        """
+        w = self.width
+        row = y * w
+        above = row - w if y > 0 else -1
+        below = row + w if y < self.height - 1 else -1
+        if dx > 0:
+            stop = mask.find(1, row + x + 1, row + w)
+            best = stop if stop >= 0 else row + w
+            if row + x < end_index < best:
+                best = end_index
+            if above >= 0:
+                forced = mask.find(b"\x01\x00", above + x, above + w)
+                if forced >= 0 and forced + w + 1 < best:
+                    best = forced + w + 1
+            if below >= 0:
+                forced = mask.find(b"\x01\x00", below + x, below + w)
+                if forced >= 0 and forced - w + 1 < best:
+                    best = forced - w + 1
+            return best if best != stop and best < row + w else -1
+        stop = mask.rfind(1, row, row + x)
+        best = stop if stop >= 0 else row - 1
+        if best < end_index < row + x:
+            best = end_index
+        if above >= 0:
+            forced = mask.rfind(b"\x00\x01", above, above + x + 1)
+            if forced >= 0 and forced + w > best:
+                best = forced + w
+        if below >= 0:
+            forced = mask.rfind(b"\x00\x01", below, below + x + 1)
+            if forced >= 0 and forced - w > best:
+                best = forced - w
+        return best if best != stop and best >= row else -1
+
+    def _jump_vertical(self, mask, x, y, dy, end_index):
+        """Scans along a column from (x, y); returns the first jump point index or -1."""
+        w, h = self.width, self.height
+        step = dy * w
+        has_left, has_right = x > 0, x < w - 1
+        jump_horizontal = self._jump_horizontal
+        index = y * w + x
+        while True:
+            y += dy
+            if not 0 <= y < h:
+                return -1
+            index += step
+            if mask[index]:
+                return -1
+            if index == end_index:
+                return index
+            behind = index - step
+            if has_left and not mask[index - 1] and mask[behind - 1]:
+                return index
+            if has_right and not mask[index + 1] and mask[behind + 1]:
+                return index
+            if jump_horizontal(mask, x, y, 1, end_index) >= 0 or jump_horizontal(mask, x, y, -1, end_index) >= 0:
+                return index
+
+    def _jump_path(self, end_index):
+        """Rebuilds the full cell path by filling in the segments between jump points."""
+        w = self.width
+        parent = self.parent
+        path = [(end_index % w, end_index // w)]
+        index = end_index
+        while parent[index] != -1:
+            previous = parent[index]
+            x, y = index % w, index // w
+            px, py = previous % w, previous // w
+            dx = (px > x) - (px < x)
+            dy = (py > y) - (py < y)
+            while (x, y) != (px, py):
+                x += dx
+                y += dy
+                path.append((x, y))
+            index = previous
+        return path[::-1]
+
+    def flood(self, occupancy, source):
+        """Fills the distance array by breadth-first search from source; returns the generation."""
+        generation = self._next_generation()
+        if not occupancy.in_bounds(source):
+            return generation
+        cells, stamp, distance = occupancy.cells, self.stamp, self.distance
+        neighbors = self._neighbors
+        source_index = occupancy.index(source)
+        stamp[source_index] = generation
+        distance[source_index] = 0
+        queue = deque([source_index])
+        expanded = 0
+
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            next_distance = distance[current] + 1
+            for neighbor in neighbors(current):
+                if neighbor < 0 or stamp[neighbor] == generation or cells[neighbor]:
+                    continue
+                stamp[neighbor] = generation
+                distance[neighbor] = next_distance
+                queue.append(neighbor)
+        self.expanded, self.pushes = expanded, expanded - 1
+        return generation
+
+
+class DistanceField:
+    """Distance-to-target map shared by every snake planning toward the same cell."""
 
-    while queue:
-        current_pos, path = queue.pop(0)
+    def __init__(self, width, height):
+        """Initializes the field with its own workspace so searches cannot clobber it."""
+        self.workspace = SearchWorkspace(width, height)
+        self.generation = 0
+        self.target = None
 
-        if current_pos == end:
-            return path
+    def build(self, occupancy, target):
+        """Runs one reverse BFS from the target over the current occupancy."""
+        self.target = target
+        self.generation = self.workspace.flood(occupancy, target)
 
-        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            neighbor_pos = (current_pos[0] + dc, current_pos[1] + dr)
+    def distance_at(self, index):
+        """Returns the field distance of a flat index, or None if it was unreachable."""
+        workspace = self.workspace
+        if workspace.stamp[index] == self.generation:
+            return workspace.distance[index]
+        return None
+
+    def _corrected_distance(self, index, head_index):
+        """Estimates a distance for a cell freed after the field was built from its neighbors."""
+        best = None
+        for neighbor in self.workspace._neighbors(index):
+            if neighbor < 0 or neighbor == head_index:
+                continue
+            distance = self.distance_at(neighbor)
+            if distance is not None and (best is None or distance < best):
+                best = distance
+        return best + 1 if best is not None else None
+
+    def path_from(self, occupancy, start):
+        """Descends the field by one step from start; returns [start, next] or None."""
+        if not occupancy.in_bounds(start):
+            return None
+        cells = occupancy.cells
+        w = occupancy.width
+        head_index = occupancy.index(start)
+        best_index, best_distance = -1, None
+        for neighbor in self.workspace._neighbors(head_index):
+            if neighbor < 0 or cells[neighbor]:
+                continue
+            distance = self.distance_at(neighbor)
+            if distance is None:
+                distance = self._corrected_distance(neighbor, head_index)
+            if distance is not None and (best_distance is None or distance < best_distance):
+                best_index, best_distance = neighbor, distance
+        if best_index < 0:
+            return None
+        return [start, (best_index % w, best_index // w)]
+
+
+_workspaces = {}
+
+
+def get_workspace(width, height):
+    """Returns the shared search workspace for a grid size, creating it on first use."""
+    workspace = _workspaces.get((width, height))
+    if workspace is None:
+        workspace = _workspaces[(width, height)] = SearchWorkspace(width, height)
+    return workspace
+
+
+def _as_occupancy(grid, snake_bodies_obstacles):
+    """Accepts either an OccupancyGrid or a legacy nested grid plus obstacle set."""
+    if isinstance(grid, OccupancyGrid):
+        return grid
+    return OccupancyGrid.from_grid(grid, snake_bodies_obstacles or ())
+
+
+def dijkstra(grid, start, end, snake_bodies_obstacles=None):
+    """Finds the shortest path using Dijkstra's algorithm."""
+    occupancy = _as_occupancy(grid, snake_bodies_obstacles)
+    return get_workspace(occupancy.width, occupancy.height).dijkstra(occupancy, start, end)
+
+
+def astar(grid, start, end, snake_bodies_obstacles=None):
+    """Finds the shortest path using A* algorithm."""
+    occupancy = _as_occupancy(grid, snake_bodies_obstacles)
+    return get_workspace(occupancy.width, occupancy.height).astar(occupancy, start, end)
+
+
+def bfs(grid, start, end, snake_bodies_obstacles=None):
+    """Finds the shortest path using BFS algorithm."""
+    occupancy = _as_occupancy(grid, snake_bodies_obstacles)
+    return get_workspace(occupancy.width, occupancy.height).bfs(occupancy, start, end)
 
-            if is_valid_pos(neighbor_pos) and grid[neighbor_pos[1]][neighbor_pos[0]] == 0 and neighbor_pos not in snake_bodies_obstacles and neighbor_pos not in visited:
-                visited.add(neighbor_pos)
-                new_path = list(path)
-                new_path.append(neighbor_pos)
-                queue.append((neighbor_pos, new_path))
 
-    return None
+def jps(grid, start, end, snake_bodies_obstacles=None):
+    """Finds the shortest path using Jump Point Search."""
+    occupancy = _as_occupancy(grid, snake_bodies_obstacles)
+    return get_workspace(occupancy.width, occupancy.height).jps(occupancy, start, end)
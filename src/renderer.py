@@ -0,0 +1,276 @@
+import pygame
+from src.camera import Camera
+from src.occupancy import WALL
+from src.settings import settings
+
+MAX_CACHED_TEXTS = 512
+MAX_CACHED_CHUNKS = 512
+CHUNK_CELLS = 32
+MIN_GRID_LINE_ZOOM = 4
+
+
+class Renderer:
+    """Draws the board through a camera from cached layers, repainting only what changed.
+
+    The background is pre-rendered in chunks of CHUNK_CELLS x CHUNK_CELLS cells per
+    zoom level and only visible chunks are blitted. Fonts and text surfaces are
+    cached. Between full redraws only cells reported by the occupancy change log
+    (plus food and newly dead snakes) are repainted and passed to
+    pygame.display.update. A minimap is shown when the board does not fit.
+    """
+
+    def __init__(self, screen, board_width=None, board_height=None):
+        """Initializes the renderer for a screen surface and board size."""
+        self.fonts = {}
+        self.texts = {}
+        self.chunks = {}
+        self.set_screen(screen, board_width, board_height)
+
+    def set_screen(self, screen, board_width=None, board_height=None):
+        """Resets the camera for a (possibly resized) screen and board."""
+        board_width = board_width if board_width is not None else settings.grid_size
+        board_height = board_height if board_height is not None else board_width
+        self.screen = screen
+        self.camera = Camera(board_width, board_height, *screen.get_size())
+        self.chunks.clear()
+        self.minimap = None
+        self.minimap_age = 0
+        self.minimap_serial = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Forces the next render to repaint the whole view (e.g. after camera moves)."""
+        self.full_redraw = True
+        self.simulator = None
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def text(self, content, size, color):
+        """Returns a cached rendered text surface."""
+        key = (content, size, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) >= MAX_CACHED_TEXTS:
+                self.texts.clear()
+            surface = self.texts[key] = self.font(size).render(content, True, color)
+        return surface
+
+    def _chunk_surface(self, chunk_x, chunk_y):
+        """Returns the cached background surface of one chunk at the current zoom."""
+        cell = self.camera.cell_size
+        key = (chunk_x, chunk_y, cell)
+        surface = self.chunks.get(key)
+        if surface is None:
+            if len(self.chunks) >= MAX_CACHED_CHUNKS:
+                self.chunks.clear()
+            columns = min(CHUNK_CELLS, self.camera.board_width - chunk_x * CHUNK_CELLS)
+            rows = min(CHUNK_CELLS, self.camera.board_height - chunk_y * CHUNK_CELLS)
+            surface = pygame.Surface((columns * cell, rows * cell))
+            surface.fill(settings.background_color)
+            if cell >= MIN_GRID_LINE_ZOOM:
+                for i in range(columns):
+                    pygame.draw.line(surface, settings.grid_color, (i * cell, 0), (i * cell, rows * cell), 1)
+                for i in range(rows):
+                    pygame.draw.line(surface, settings.grid_color, (0, i * cell), (columns * cell, i * cell), 1)
+            self.chunks[key] = surface
+        return surface
+
+    def _blit_background(self, clip=None):
+        """Blits every visible background chunk, optionally clipped to a rect."""
+        camera = self.camera
+        screen = self.screen
+        screen.set_clip(clip)
+        screen.fill(settings.background_color, clip)
+        x0, y0, x1, y1 = camera.visible_range()
+        if clip is not None:
+            cx0, cy0 = camera.to_cell(clip.topleft)
+            cx1, cy1 = camera.to_cell((clip.right - 1, clip.bottom - 1))
+            x0, y0, x1, y1 = max(x0, cx0), max(y0, cy0), min(x1, cx1 + 1), min(y1, cy1 + 1)
+        for chunk_y in range(y0 // CHUNK_CELLS, (y1 - 1) // CHUNK_CELLS + 1):
+            for chunk_x in range(x0 // CHUNK_CELLS, (x1 - 1) // CHUNK_CELLS + 1):
+                origin = camera.to_screen((chunk_x * CHUNK_CELLS, chunk_y * CHUNK_CELLS))
+                screen.blit(self._chunk_surface(chunk_x, chunk_y), origin)
+        screen.set_clip(None)
+
+    def _cell_rect(self, pos):
+        cell = self.camera.cell_size
+        x, y = self.camera.to_screen(pos)
+        return pygame.Rect(x, y, cell, cell)
+
+    def _place_overlays(self, simulator, hud):
+        """Lays out hud text given as (content, size, color, (anchor, point)) plus the minimap."""
+        placed = []
+        for content, size, color, (anchor, point) in hud:
+            surface = self.text(content, size, color)
+            placed.append((surface, surface.get_rect(**{anchor: point})))
+        if self.minimap is not None:
+            size = settings.minimap_size
+            placed.append((self.minimap, pygame.Rect(10, self.camera.view_height - 40 - size, size, size)))
+        return placed
+
+    def render(self, simulator, hud):
+        """Draws the simulator state and hud text, fully or as dirty rects."""
+        self._update_minimap(simulator)
+        if self.full_redraw or simulator is not self.simulator:
+            self._render_full(simulator, hud)
+        else:
+            self._render_dirty(simulator, hud)
+
+    def _render_full(self, simulator, hud):
+        screen = self.screen
+        camera = self.camera
+        self._blit_background()
+        self.drawn = {}
+        food_pos = simulator.food_pos
+        if food_pos is not None and camera.is_visible(food_pos):
+            screen.fill(settings.food_color, self._cell_rect(food_pos))
+            self.drawn[food_pos] = settings.food_color
+        for snake in simulator.snakes:
+            if snake.is_alive:
+                for segment in snake.body:
+                    if camera.is_visible(segment):
+                        screen.fill(snake.color, self._cell_rect(segment))
+                        self.drawn[segment] = snake.color
+
+        placed = self._place_overlays(simulator, hud)
+        for surface, rect in placed:
+            screen.blit(surface, rect)
+        pygame.display.flip()
+
+        self.simulator = simulator
+        self.full_redraw = False
+        self.version = simulator.occupancy.version
+        self.food_pos = food_pos
+        self.alive_ids = {snake.id for snake in simulator.snakes if snake.is_alive}
+        self.overlay_key = (list(hud), self.minimap_serial)
+        self.overlay_rects = [rect for _, rect in placed]
+
+    def _render_dirty(self, simulator, hud):
+        occupancy = simulator.occupancy
+        camera = self.camera
+        changes = occupancy.changes_since(self.version)
+        if changes is None or len(changes) > camera.columns * camera.rows // 4:
+            self._render_full(simulator, hud)
+            return
+        self.version = occupancy.version
+
+        positions = {occupancy.position(index) for index in changes}
+        if simulator.food_pos != self.food_pos:
+            positions.add(self.food_pos)
+            positions.add(simulator.food_pos)
+            self.food_pos = simulator.food_pos
+        alive = [snake for snake in simulator.snakes if snake.is_alive]
+        if len(alive) != len(self.alive_ids):
+            for snake in simulator.snakes:
+                if not snake.is_alive and snake.id in self.alive_ids:
+                    positions.update(snake.body)
+            self.alive_ids = {snake.id for snake in alive}
+        heads = {snake.body[0]: snake.color for snake in alive}
+
+        screen = self.screen
+        dirty = []
+        for pos in positions:
+            if pos is None or not camera.is_visible(pos):
+                continue
+            color = self._desired_color(pos, simulator, occupancy, heads, alive)
+            if self.drawn.get(pos) == color:
+                continue
+            rect = self._cell_rect(pos)
+            if color is None:
+                del self.drawn[pos]
+                self._blit_background(rect)
+            else:
+                self.drawn[pos] = color
+                screen.fill(color, rect)
+            dirty.append(rect)
+
+        overlay_key = (hud, self.minimap_serial)
+        if overlay_key != self.overlay_key or any(rect.collidelist(self.overlay_rects) >= 0 for rect in dirty):
+            for rect in self.overlay_rects:
+                self._restore(rect)
+            placed = self._place_overlays(simulator, hud)
+            for surface, rect in placed:
+                screen.blit(surface, rect)
+            dirty.extend(self.overlay_rects)
+            self.overlay_key = (list(hud), self.minimap_serial)
+            self.overlay_rects = [rect for _, rect in placed]
+            dirty.extend(self.overlay_rects)
+
+        if dirty:
+            pygame.display.update(dirty)
+
+    def _desired_color(self, pos, simulator, occupancy, heads, alive):
+        if pos == simulator.food_pos:
+            return settings.food_color
+        if occupancy.cells[occupancy.index(pos)] == 0:
+            return None
+        color = heads.get(pos)
+        if color is not None:
+            return color
+        for snake in alive:
+            if pos in snake.body:
+                return snake.color
+        return None
+
+    def _restore(self, rect):
+        """Repaints the background and any drawn cells under a screen rect."""
+        self._blit_background(rect)
+        screen = self.screen
+        screen.set_clip(rect)
+        x0, y0 = self.camera.to_cell(rect.topleft)
+        x1, y1 = self.camera.to_cell((rect.right - 1, rect.bottom - 1))
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                color = self.drawn.get((x, y))
+                if color is not None:
+                    screen.fill(color, self._cell_rect((x, y)))
+        screen.set_clip(None)
+
+    def _update_minimap(self, simulator):
+        """Rebuilds the sampled board overview every settings.minimap_interval frames."""
+        camera = self.camera
+        if camera.shows_whole_board():
+            if self.minimap is not None:
+                self.minimap = None
+                self.minimap_serial += 1
+            return
+        self.minimap_age -= 1
+        if self.minimap is not None and self.minimap_age > 0 and simulator is self.simulator:
+            return
+        self.minimap_age = settings.minimap_interval
+
+        size = settings.minimap_size
+        occupancy = simulator.occupancy
+        w, h = occupancy.width, occupancy.height
+        cells = occupancy.cells
+        surface = pygame.Surface((size, size))
+        surface.fill(settings.background_color)
+        pixels = pygame.PixelArray(surface)
+        wall = surface.map_rgb(settings.grid_color)
+        body = surface.map_rgb((90, 90, 90))
+        for py in range(size):
+            row = (py * h // size) * w
+            for px in range(size):
+                value = cells[row + px * w // size]
+                if value:
+                    pixels[px, py] = wall if value == WALL else body
+        del pixels
+
+        for snake in simulator.snakes:
+            if snake.is_alive:
+                head = snake.body[0]
+                surface.fill(snake.color, (head[0] * size // w - 1, head[1] * size // h - 1, 3, 3))
+        if simulator.food_pos is not None:
+            food = simulator.food_pos
+            surface.fill(settings.food_color, (food[0] * size // w - 1, food[1] * size // h - 1, 3, 3))
+        x0, y0, x1, y1 = camera.visible_range()
+        view = pygame.Rect(x0 * size // w, y0 * size // h,
+                           max(1, (x1 - x0) * size // w), max(1, (y1 - y0) * size // h))
+        pygame.draw.rect(surface, (255, 255, 255), view, 1)
+        pygame.draw.rect(surface, settings.grid_color, surface.get_rect(), 1)
+        self.minimap = surface
+        self.minimap_serial += 1
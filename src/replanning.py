@@ -0,0 +1,270 @@
+import heapq
+from src.pathfinding import SearchWorkspace
+
+INF = 1 << 30
+
+
+class IncrementalPlanner:
+    """Per-snake D* Lite planner that caches its path across ticks.
+
+    The search runs backward from the food, so the snake's head can advance
+    without invalidating g-values. Each tick the planner first tries to reuse the
+    remaining cached path; if a changed cell blocks it or was freed close enough
+    to open a shortcut, the plan is repaired incrementally from the occupancy
+    change log. Only a new food position (or a trimmed change log) forces a full
+    replan.
+
+    g and rhs are dicts rather than grid arrays, so memory follows the explored
+    area instead of the board size; with many snakes on a large board, per-snake
+    grid arrays would not fit. A missing g is INF and a missing rhs equals g, so
+    only the cells still waiting in the queue keep an rhs entry.
+    """
+
+    _neighbors = SearchWorkspace._neighbors
+
+    def __init__(self, width, height):
+        """Sets up an empty search for a width x height grid."""
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.g = {}
+        self.rhs = {}
+        self.cells = None
+        self.queue = []
+        self.queued = {}
+        self.goal = None
+        self.start = None
+        self.km = 0
+        self.head = None
+        self.path = None
+        self.version = None
+        self.pending = set()
+
+        self.plans = 0
+        self.cache_hits = 0
+        self.repairs = 0
+        self.full_replans = 0
+        self.expanded = 0
+        self.pushes = 0
+
+    def stats(self):
+        """Returns the planner counters, including the cache hit rate."""
+        return {
+            "plans": self.plans,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": self.cache_hits / self.plans if self.plans else 0.0,
+            "repairs": self.repairs,
+            "full_replans": self.full_replans,
+            "nodes_expanded": self.expanded,
+            "heap_pushes": self.pushes,
+        }
+
+    def plan(self, occupancy, start_pos, goal_pos):
+        """Returns a shortest path from start_pos to goal_pos, reusing earlier work."""
+        self.plans += 1
+        self.cells = occupancy.cells
+        start = occupancy.index(start_pos)
+        goal = occupancy.index(goal_pos)
+        changes = occupancy.changes_since(self.version) if self.version is not None else None
+        self.version = occupancy.version
+        previous_head, self.head = self.head, start
+
+        if goal != self.goal or changes is None:
+            self.full_replans += 1
+            self._replan(start, goal)
+        else:
+            self.pending.update(changes)
+            if previous_head != start:
+                self.pending.add(previous_head)
+                self.pending.add(start)
+            if self._reuse_cached_path(start, changes):
+                self.cache_hits += 1
+            else:
+                self.repairs += 1
+                self._repair(start)
+
+        if self.path is None:
+            return None
+        w = self.width
+        return [(index % w, index // w) for index in self.path]
+
+    def _reuse_cached_path(self, start, changes):
+        """Advances the cached path if no changed cell blocks it or could shorten it.
+
+        A freed cell can only shorten the path if the Manhattan distance from the
+        head through it to the goal is below the remaining path length.
+        """
+        path = self.path
+        if not path or len(path) < 2 or path[1] != start:
+            return False
+        remaining = path[1:]
+        length = len(remaining) - 1
+        on_path = set(remaining)
+        cells, goal, heuristic = self.cells, self.goal, self._heuristic
+        for index in changes:
+            if index == start:
+                continue
+            if cells[index]:
+                if index in on_path:
+                    return False
+            elif heuristic(start, index) + heuristic(index, goal) < length:
+                return False
+        self.path = remaining
+        return True
+
+    def _passable(self, index):
+        return index == self.start or self.cells[index] == 0
+
+    def _heuristic(self, a, b):
+        w = self.width
+        return abs(a % w - b % w) + abs(a // w - b // w)
+
+    def _push(self, index, g_value, rhs_value):
+        """Queues index under its key, unless it is already queued with that key."""
+        m = g_value if g_value < rhs_value else rhs_value
+        w, start = self.width, self.start
+        key = (m + abs(start % w - index % w) + abs(start // w - index // w) + self.km, m)
+        if self.queued.get(index) == key:
+            return
+        self.queued[index] = key
+        heapq.heappush(self.queue, (key[0], m, index))
+        self.pushes += 1
+
+    def _update_vertex(self, index):
+        """Recomputes rhs for index from its neighbors and queues it while it is inconsistent."""
+        g, rhs = self.g, self.rhs
+        g_value = g.get(index, INF)
+        if index == self.goal:
+            if rhs.get(index, g_value) != g_value:
+                self._push(index, g_value, rhs[index])
+            return
+        cells, start = self.cells, self.start
+        best = INF
+        if index == start or not cells[index]:
+            w = self.width
+            x = index % w
+            for neighbor in (index + 1 if x < w - 1 else -1, index - 1 if x > 0 else -1,
+                             index + w if index + w < self.size else -1, index - w):
+                if neighbor >= 0 and (neighbor == start or not cells[neighbor]):
+                    distance = g.get(neighbor, INF) + 1
+                    if distance < best:
+                        best = distance
+        if best == g_value:
+            rhs.pop(index, None)
+            self.queued.pop(index, None)
+        else:
+            rhs[index] = best
+            self._push(index, g_value, best)
+
+    def _compute_shortest_path(self):
+        """Expands inconsistent cells until the start is consistent and nothing queued can improve it.
+
+        Lowering a cell's g only lowers its neighbors' rhs, so they are updated
+        in place; raising it re-scans just the neighbors whose rhs went through it.
+        """
+        queue, queued, g, rhs, cells = self.queue, self.queued, self.g, self.rhs, self.cells
+        start, goal, km, w, size = self.start, self.goal, self.km, self.width, self.size
+        start_x, start_y = start % w, start // w
+        heappop, push, update_vertex = heapq.heappop, self._push, self._update_vertex
+        expanded = 0
+        while queue:
+            k1, k2, index = queue[0]
+            if queued.get(index) != (k1, k2):
+                heappop(queue)
+                continue
+            if start not in rhs:
+                g_start = g.get(start, INF)
+                if (k1, k2) >= (g_start + km, g_start):
+                    break
+            heappop(queue)
+            del queued[index]
+            expanded += 1
+
+            g_value = g.get(index, INF)
+            rhs_value = rhs[index]
+            m = g_value if g_value < rhs_value else rhs_value
+            x = index % w
+            new_k1 = m + abs(start_x - x) + abs(start_y - index // w) + km
+            if (k1, k2) < (new_k1, m):
+                push(index, g_value, rhs_value)
+                continue
+            neighbors = (index + 1 if x < w - 1 else -1, index - 1 if x > 0 else -1,
+                         index + w if index + w < size else -1, index - w)
+            if g_value > rhs_value:
+                g[index] = rhs_value
+                del rhs[index]
+                distance = rhs_value + 1
+                for neighbor in neighbors:
+                    if neighbor < 0 or neighbor == goal or (neighbor != start and cells[neighbor]):
+                        continue
+                    g_neighbor = g.get(neighbor, INF)
+                    if distance < rhs.get(neighbor, g_neighbor):
+                        if distance == g_neighbor:
+                            del rhs[neighbor]
+                            queued.pop(neighbor, None)
+                        else:
+                            rhs[neighbor] = distance
+                            push(neighbor, g_neighbor, distance)
+            else:
+                del g[index]
+                update_vertex(index)
+                through = g_value + 1
+                for neighbor in neighbors:
+                    if neighbor >= 0 and neighbor != goal:
+                        g_neighbor = g.get(neighbor, INF)
+                        if rhs.get(neighbor, g_neighbor) == through:
+                            update_vertex(neighbor)
+        self.expanded += expanded
+
+    def _extract_path(self):
+        start, goal, g, cells = self.start, self.goal, self.g, self.cells
+        if g.get(start, INF) >= INF:
+            return None
+        w, size = self.width, self.size
+        path = [start]
+        current = start
+        while current != goal:
+            best, best_g = -1, INF
+            x = current % w
+            for neighbor in (current + 1 if x < w - 1 else -1, current - 1 if x > 0 else -1,
+                             current + w if current + w < size else -1, current - w):
+                if neighbor >= 0 and not cells[neighbor]:
+                    distance = g.get(neighbor, INF)
+                    if distance < best_g:
+                        best, best_g = neighbor, distance
+            if best < 0 or len(path) > size:
+                return None
+            path.append(best)
+            current = best
+        return path
+
+    def _replan(self, start, goal):
+        """Discards all search state and plans from scratch toward a new goal."""
+        self.g.clear()
+        self.rhs.clear()
+        self.queue = []
+        self.queued = {}
+        self.pending.clear()
+        self.km = 0
+        self.goal = goal
+        self.start = start
+        self.rhs[goal] = 0
+        self._push(goal, INF, 0)
+        self._compute_shortest_path()
+        self.path = self._extract_path()
+
+    def _repair(self, start):
+        """Applies the pending cell changes to the existing search and replans incrementally."""
+        self.km += self._heuristic(self.start, start)
+        self.start = start
+        g, update_vertex = self.g, self._update_vertex
+        for index in self.pending:
+            update_vertex(index)
+            # Only a cell with a known distance feeds its neighbors' rhs.
+            if index in g:
+                for neighbor in self._neighbors(index):
+                    if neighbor >= 0:
+                        update_vertex(neighbor)
+        self.pending.clear()
+        self._compute_shortest_path()
+        self.path = self._extract_path()
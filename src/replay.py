@@ -0,0 +1,474 @@
+"""Compact binary replays: record, inspect, verify and seek through games.
+
+Usage:
+    python -m src.replay record game.replay --seed 7 --grid-size 30
+    python -m src.replay info game.replay
+    python -m src.replay verify game.replay
+    python main.py --replay game.replay
+
+Layout (little-endian):
+    header      b"SNKR", u16 version, u32 length, JSON settings (grid size,
+                algorithms, colors, modes, scheduler, seed, keyframe interval)
+    chunks      a keyframe every keyframe_interval ticks, each followed by the
+                tick records up to the next keyframe
+    keyframe    u32 tick, u32 food, u16 snakes, then per snake u8 state,
+                u32 score, u32 length and length u32 cells (head first)
+    tick        u8 food flag (0 unchanged, 1 new food u32 follows, 2 none),
+                then one nibble per snake (MOVE_CODES, or STILL / a death code)
+    footer      u32 keyframes, (u32 tick, u64 offset) per keyframe,
+                u32 ticks, u64 index offset, b"SNKI"
+
+Cells and food are flat indices (y * width + x); NO_FOOD marks a missing one.
+"""
+import argparse
+import bisect
+import json
+import mmap
+import random
+import struct
+import sys
+from array import array
+from src.occupancy import OccupancyGrid
+from src.scheduler import PlanningScheduler
+from src.settings import settings
+from src.simulation import Simulator
+from src.snake import Snake, SnakeBody
+
+MAGIC = b"SNKR"
+INDEX_MAGIC = b"SNKI"
+VERSION = 1
+NO_FOOD = 0xFFFFFFFF
+
+STILL = 0
+MOVE_CODES = {(1, 0): 1, (-1, 0): 2, (0, 1): 3, (0, -1): 4}
+MOVES = {code: move for move, code in MOVE_CODES.items()}
+DEATH_CODES = {"trapped": 5, "collision": 6}
+DEATHS = {code: cause for cause, code in DEATH_CODES.items()}
+
+FOOD_UNCHANGED, FOOD_SPAWNED, FOOD_GONE = 0, 1, 2
+
+_HEADER = struct.Struct("<4sHI")
+_KEYFRAME = struct.Struct("<IIH")
+_KEYFRAME_SNAKE = struct.Struct("<BII")
+_INDEX_ENTRY = struct.Struct("<IQ")
+_FOOTER = struct.Struct("<IQ4s")
+_U32 = struct.Struct("<I")
+
+
+def _cells_bytes(cells):
+    packed = array('I', cells)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _cells_from(buffer, offset, count):
+    cells = array('I')
+    cells.frombytes(buffer[offset:offset + 4 * count])
+    if sys.byteorder == "big":
+        cells.byteswap()
+    return cells
+
+
+def _food_index(food_pos, width):
+    return NO_FOOD if food_pos is None else food_pos[1] * width + food_pos[0]
+
+
+def _pack_moves(codes):
+    packed = bytearray((len(codes) + 1) // 2)
+    for i, code in enumerate(codes):
+        packed[i >> 1] |= code << (4 * (i & 1))
+    return bytes(packed)
+
+
+def encode_keyframe(simulator):
+    """Returns a keyframe holding the simulator's full state."""
+    size = simulator.grid_size
+    parts = [_KEYFRAME.pack(simulator.tick, _food_index(simulator.food_pos, size), len(simulator.snakes))]
+    for snake in simulator.snakes:
+        state = 1 if snake.is_alive else DEATH_CODES.get(snake.death_cause, 0) << 1
+        cells = [y * size + x for x, y in snake.body]
+        parts.append(_KEYFRAME_SNAKE.pack(state, snake.score, len(cells)))
+        parts.append(_cells_bytes(cells))
+    return b"".join(parts)
+
+
+def decode_keyframe(header, buffer, offset=0):
+    """Decodes the keyframe at offset; returns (ReplayState, offset just past it)."""
+    tick, food, count = _KEYFRAME.unpack_from(buffer, offset)
+    offset += _KEYFRAME.size
+    snakes = []
+    for _ in range(count):
+        state, score, length = _KEYFRAME_SNAKE.unpack_from(buffer, offset)
+        offset += _KEYFRAME_SNAKE.size
+        snakes.append((state, score, _cells_from(buffer, offset, length)))
+        offset += 4 * length
+    return ReplayState(header, tick, food, snakes), offset
+
+
+def header_for(simulator, keyframe_interval):
+    """Returns the header settings that reproduce a simulator's game."""
+    return {
+        "version": VERSION,
+        "grid_size": simulator.grid_size,
+        "num_snakes": simulator.num_snakes,
+        "algorithms": simulator.algorithms,
+        "colors": [list(color) for color in simulator.colors],
+        "planning_mode": simulator.planning_mode,
+        "collision_mode": simulator.collision_mode if simulator.scheduler is None else "simultaneous",
+        "backends": simulator.backends,
+        "seed": simulator.seed,
+        "safety_algorithms": simulator.safety_algorithms,
+        "scheduler": _scheduler_settings(simulator.scheduler),
+        "keyframe_interval": keyframe_interval,
+    }
+
+
+def _scheduler_settings(scheduler):
+    """Returns the planning scheduler settings a header needs, or None without a scheduler."""
+    if scheduler is None:
+        return None
+    return {
+        "workers": scheduler.workers,
+        "tick_budget": scheduler.tick_budget,
+        "node_budget": scheduler.node_budget,
+        "deterministic": scheduler.deterministic,
+    }
+
+
+class TickEncoder:
+    """Turns consecutive simulator states into packed tick records."""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.capture()
+
+    def capture(self):
+        """Remembers the pre-tick heads, liveness and food."""
+        simulator = self.simulator
+        self.heads = [snake.body[0] for snake in simulator.snakes]
+        self.alive = [snake.is_alive for snake in simulator.snakes]
+        self.food_pos = simulator.food_pos
+
+    def encode(self):
+        """Returns the record for the tick since the last capture, then captures again."""
+        simulator = self.simulator
+        codes = []
+        for snake, head, was_alive in zip(simulator.snakes, self.heads, self.alive):
+            if not was_alive:
+                codes.append(STILL)
+            elif not snake.is_alive:
+                codes.append(DEATH_CODES.get(snake.death_cause, DEATH_CODES["collision"]))
+            else:
+                new_head = snake.body[0]
+                codes.append(MOVE_CODES[(new_head[0] - head[0], new_head[1] - head[1])])
+        if simulator.food_pos == self.food_pos:
+            food = bytes([FOOD_UNCHANGED])
+        elif simulator.food_pos is None:
+            food = bytes([FOOD_GONE])
+        else:
+            food = bytes([FOOD_SPAWNED]) + _U32.pack(_food_index(simulator.food_pos, simulator.grid_size))
+        self.capture()
+        return food + _pack_moves(codes)
+
+
+class ReplayWriter:
+    """Records a simulator's game to a replay file as it is stepped."""
+
+    def __init__(self, path, simulator, keyframe_interval=None):
+        """Writes the header and the tick-0 keyframe."""
+        self.simulator = simulator
+        self.keyframe_interval = keyframe_interval or settings.replay_keyframe_interval
+        self.file = open(path, "wb")
+        header = json.dumps(header_for(simulator, self.keyframe_interval)).encode()
+        self.file.write(_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+        self.index = []
+        self.encoder = TickEncoder(simulator)
+        self._write_keyframe()
+
+    def _write_keyframe(self):
+        self.index.append((self.simulator.tick, self.file.tell()))
+        self.file.write(encode_keyframe(self.simulator))
+
+    def step(self):
+        """Steps the simulator, records the tick and returns whether the game is over."""
+        game_over = self.simulator.step()
+        self.file.write(self.encoder.encode())
+        if self.simulator.tick % self.keyframe_interval == 0 and not game_over:
+            self._write_keyframe()
+        return game_over
+
+    def close(self):
+        """Writes the keyframe index and footer."""
+        if self.file is None:
+            return
+        index_offset = self.file.tell()
+        self.file.write(_U32.pack(len(self.index)))
+        for tick, offset in self.index:
+            self.file.write(_INDEX_ENTRY.pack(tick, offset))
+        self.file.write(_FOOTER.pack(self.simulator.tick, index_offset, INDEX_MAGIC))
+        self.file.close()
+        self.file = None
+
+
+class ReplayState:
+    """Board, snakes and food of a replay at one tick, advanced by tick records."""
+
+    def __init__(self, header, tick, food, snakes):
+        size = header["grid_size"]
+        self.header = header
+        self.grid_size = size
+        self.tick = tick
+        self.food_pos = None if food == NO_FOOD else (food % size, food // size)
+        self.occupancy = OccupancyGrid.walled(size)
+        self.snakes = []
+        rng = random.Random(0)
+        algorithms, colors = header["algorithms"], header["colors"]
+        for i, (state, score, cells) in enumerate(snakes):
+            snake = Snake((1, 1), tuple(colors[i % len(colors)]), i, algorithms[i % len(algorithms)], size, rng=rng)
+            snake.body = SnakeBody(size, [(index % size, index // size) for index in cells])
+            snake.score = score
+            snake.is_alive = bool(state & 1)
+            snake.death_cause = DEATHS.get(state >> 1)
+            for segment in snake.body:
+                self.occupancy.occupy(segment)
+            self.snakes.append(snake)
+        self.game_over = False
+
+    def apply(self, buffer, offset):
+        """Applies the tick record at offset; returns the offset after it."""
+        flag = buffer[offset]
+        offset += 1
+        if flag == FOOD_SPAWNED:
+            (food,) = _U32.unpack_from(buffer, offset)
+            offset += 4
+            new_food = (food % self.grid_size, food // self.grid_size)
+        elif flag == FOOD_GONE:
+            new_food = None
+        else:
+            new_food = self.food_pos
+
+        occupancy = self.occupancy
+        for i, snake in enumerate(self.snakes):
+            code = (buffer[offset + (i >> 1)] >> (4 * (i & 1))) & 0xF
+            if code in MOVES:
+                dx, dy = MOVES[code]
+                head = snake.body[0]
+                next_pos = (head[0] + dx, head[1] + dy)
+                grow = next_pos == self.food_pos
+                if grow:
+                    snake.score += 1
+                snake.advance(occupancy, next_pos, grow)
+            elif code in DEATHS:
+                snake.is_alive = False
+                snake.death_cause = DEATHS[code]
+        self.food_pos = new_food
+        self.tick += 1
+        return offset + (len(self.snakes) + 1) // 2
+
+
+class ReplayReader:
+    """Memory-mapped replay file that can rebuild the state at any tick."""
+
+    def __init__(self, path):
+        """Maps the file and reads its header and keyframe index."""
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = _HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.header = json.loads(self.buffer[_HEADER.size:_HEADER.size + length])
+        self.tick_count, index_offset, index_magic = _FOOTER.unpack_from(self.buffer, len(self.buffer) - _FOOTER.size)
+        if index_magic != INDEX_MAGIC:
+            raise ValueError(f"{path} has no keyframe index (was the recording closed?)")
+        (count,) = _U32.unpack_from(self.buffer, index_offset)
+        entries = [_INDEX_ENTRY.unpack_from(self.buffer, index_offset + 4 + i * _INDEX_ENTRY.size) for i in range(count)]
+        self.keyframe_ticks = [tick for tick, _ in entries]
+        self.keyframe_offsets = [offset for _, offset in entries]
+        self.keyframe_at = {offset: number for number, offset in enumerate(self.keyframe_offsets)}
+        self.records_end = index_offset
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+    def _read_keyframe(self, number):
+        """Decodes a keyframe; returns (state, offset of the first tick record after it)."""
+        return decode_keyframe(self.header, self.buffer, self.keyframe_offsets[number])
+
+    def seek(self, tick):
+        """Rebuilds the state after tick ticks; returns (state, offset of its next record)."""
+        tick = max(0, min(tick, self.tick_count))
+        number = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        state, offset = self._read_keyframe(number)
+        while state.tick < tick:
+            offset = self.advance(state, offset)
+        state.game_over = state.tick >= self.tick_count
+        return state, offset
+
+    def state_at(self, tick):
+        """Rebuilds the state after tick ticks from the nearest earlier keyframe."""
+        return self.seek(tick)[0]
+
+    def advance(self, state, offset):
+        """Applies the next tick record to state, stepping over a keyframe in the way."""
+        if offset in self.keyframe_at:
+            offset = self._read_keyframe(self.keyframe_at[offset])[1]
+        return state.apply(self.buffer, offset)
+
+    def records(self):
+        """Yields the raw record of every tick in order."""
+        state, offset = self._read_keyframe(0)
+        while state.tick < self.tick_count:
+            if offset in self.keyframe_at:
+                offset = self._read_keyframe(self.keyframe_at[offset])[1]
+            end = state.apply(self.buffer, offset)
+            yield bytes(self.buffer[offset:end])
+            offset = end
+
+
+class ReplayPlayer:
+    """Steps through a replay with the simulator interface the frontend renders."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.seek(0)
+
+    def seek(self, tick):
+        """Jumps to a tick via the nearest keyframe."""
+        self.state, self.offset = self.reader.seek(tick)
+
+    @property
+    def snakes(self):
+        return self.state.snakes
+
+    @property
+    def food_pos(self):
+        return self.state.food_pos
+
+    @property
+    def occupancy(self):
+        return self.state.occupancy
+
+    @property
+    def tick(self):
+        return self.state.tick
+
+    @property
+    def game_over(self):
+        return self.state.game_over
+
+    def survival_ticks(self, snake):
+        return self.state.tick
+
+    def step(self):
+        """Advances one recorded tick and returns whether the replay has ended."""
+        state = self.state
+        if not state.game_over:
+            self.offset = self.reader.advance(state, self.offset)
+            state.game_over = state.tick >= self.reader.tick_count
+        return state.game_over
+
+
+def simulator_from_header(header):
+    """Builds a fresh simulator with the settings and seed recorded in a header.
+
+    Raises ValueError for games planned by a real-time scheduler, whose
+    searches depended on wall-clock deadlines and cannot be re-run.
+    """
+    scheduler = header.get("scheduler")
+    if scheduler is not None:
+        if not scheduler["deterministic"]:
+            raise ValueError("the game was planned against real-time deadlines and cannot be re-simulated")
+        scheduler = PlanningScheduler(scheduler["workers"], node_budget=scheduler["node_budget"], deterministic=True)
+    return Simulator(
+        grid_size=header["grid_size"],
+        algorithms=header["algorithms"],
+        colors=[tuple(color) for color in header["colors"]],
+        num_snakes=header["num_snakes"],
+        planning_mode=header["planning_mode"],
+        collision_mode=header["collision_mode"],
+        backends=header["backends"],
+        seed=header["seed"],
+        safety_algorithms=header.get("safety_algorithms", []),
+        scheduler=scheduler,
+    )
+
+
+def verify(path):
+    """Re-simulates a replay headlessly; returns the first tick that differs, or None.
+
+    Raises ValueError when the game cannot be re-simulated (see simulator_from_header).
+    """
+    reader = ReplayReader(path)
+    simulator = None
+    try:
+        simulator = simulator_from_header(reader.header)
+        encoder = TickEncoder(simulator)
+        for tick, record in enumerate(reader.records()):
+            simulator.step()
+            if encoder.encode() != record:
+                return tick
+        if simulator.tick != reader.tick_count:
+            return simulator.tick
+        return None
+    finally:
+        if simulator is not None and simulator.scheduler is not None:
+            simulator.scheduler.close()
+        reader.close()
+
+
+def record(path, simulator, max_ticks=None, keyframe_interval=None):
+    """Plays a simulator's game to the end while recording it; returns the tick count."""
+    writer = ReplayWriter(path, simulator, keyframe_interval)
+    try:
+        while not simulator.game_over:
+            if max_ticks is not None and simulator.tick >= max_ticks:
+                break
+            writer.step()
+    finally:
+        writer.close()
+    return simulator.tick
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, inspect and verify game replays.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="play a headless game and record it")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--seed", type=int, default=None)
+    record_parser.add_argument("--grid-size", type=int, default=settings.grid_size)
+    record_parser.add_argument("--snakes", type=int, default=settings.num_snakes)
+    record_parser.add_argument("--algorithms", nargs="+", default=settings.selected_algorithms)
+    record_parser.add_argument("--max-ticks", type=int, default=5000)
+    record_parser.add_argument("--keyframe-interval", type=int, default=settings.replay_keyframe_interval)
+    info_parser = commands.add_parser("info", help="print a replay's header")
+    info_parser.add_argument("path")
+    verify_parser = commands.add_parser("verify", help="re-simulate a replay and compare every tick")
+    verify_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        simulator = Simulator(grid_size=args.grid_size, algorithms=args.algorithms, num_snakes=args.snakes, seed=args.seed)
+        ticks = record(args.path, simulator, args.max_ticks, args.keyframe_interval)
+        print(f"recorded {ticks} ticks (seed {simulator.seed}) to {args.path}")
+    elif args.command == "info":
+        reader = ReplayReader(args.path)
+        for key, value in {**reader.header, "ticks": reader.tick_count, "keyframes": len(reader.keyframe_ticks)}.items():
+            print(f"{key}: {value}")
+        reader.close()
+    else:
+        try:
+            mismatch = verify(args.path)
+        except ValueError as error:
+            print(f"{args.path}: cannot verify: {error}")
+            sys.exit(2)
+        if mismatch is None:
+            print(f"{args.path}: replay matches re-simulation")
+        else:
+            print(f"{args.path}: diverges at tick {mismatch}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
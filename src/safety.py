@@ -0,0 +1,79 @@
+from array import array
+from src.pathfinding import SearchWorkspace
+
+
+class SafetyEvaluator:
+    """Scores candidate head moves by the room they leave, using bounded flood fills.
+
+    A fill from the candidate cell counts the free cells reachable from it,
+    stopping once limit cells are found, and notes whether it touches the
+    snake's tail, which keeps freeing up as the snake moves. Results are
+    memoized until the occupancy changes, so snakes that look at the same cells
+    of the same board state (every snake within a simultaneous tick) share them.
+    The fill only needs a visited stamp per cell, not a full search workspace.
+    """
+
+    _neighbors = SearchWorkspace._neighbors
+    _next_generation = SearchWorkspace._next_generation
+
+    def __init__(self, width, height):
+        """Allocates the visited stamps and an empty memo."""
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.stamp = array('I', [0]) * self.size
+        self.generation = 0
+        self.memo = {}
+        self.board = None
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.cells_filled = 0
+
+    def stats(self):
+        """Returns the fill and memo counters."""
+        lookups = self.evaluations + self.cache_hits
+        return {
+            "evaluations": self.evaluations,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "cells_filled": self.cells_filled,
+        }
+
+    def evaluate(self, occupancy, pos, tail, limit):
+        """Returns (area, tail_reachable) after moving a head to pos; area is capped at limit."""
+        board = (occupancy, occupancy.version)
+        if board != self.board:
+            self.board = board
+            self.memo.clear()
+        key = (pos, tail, limit)
+        result = self.memo.get(key)
+        if result is not None:
+            self.cache_hits += 1
+            return result
+        self.evaluations += 1
+        result = self.memo[key] = self._fill(occupancy, occupancy.index(pos), occupancy.index(tail), limit)
+        return result
+
+    def _fill(self, occupancy, start, tail, limit):
+        """Breadth-first fill from start over free cells, stopping at limit cells."""
+        cells = occupancy.cells
+        if cells[start]:
+            return 0, False
+        generation = self._next_generation()
+        stamp = self.stamp
+        neighbors = self._neighbors
+        stamp[start] = generation
+        queue = [start]
+        tail_reachable = False
+        position = 0
+        while position < len(queue) < limit:
+            for neighbor in neighbors(queue[position]):
+                if neighbor == tail:
+                    tail_reachable = True
+                if neighbor < 0 or stamp[neighbor] == generation or cells[neighbor]:
+                    continue
+                stamp[neighbor] = generation
+                queue.append(neighbor)
+            position += 1
+        self.cells_filled += len(queue)
+        return min(len(queue), limit), tail_reachable
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from src.pathfinding import SearchWorkspace
+from src.settings import settings
+
+SEARCH_METHODS = {"Dijkstra": "dijkstra", "A*": "astar", "BFS": "bfs", "JPS": "jps"}
+
+
+class PlanningScheduler:
+    """Runs every live snake's path query for a tick concurrently on a worker pool.
+
+    Queries read the live board, which cannot change until plan() has collected
+    every result, with one search workspace per worker thread. In real-time mode every search shares
+    a perf_counter deadline of tick_budget seconds after the tick starts and gives
+    up when it passes, so the planning phase of a tick is bounded. Deterministic
+    mode replaces the deadline with a per-search node_budget, which makes the
+    outcome independent of worker count and machine speed. A snake whose search
+    was cut short falls back to its previous path or a survival move.
+    """
+
+    def __init__(self, workers=None, tick_budget=None, node_budget=None, deterministic=None):
+        """Initializes the worker pool; budgets left as None use the planning settings."""
+        self.workers = workers if workers is not None else settings.planning_workers
+        self.tick_budget = tick_budget if tick_budget is not None else settings.planning_tick_budget
+        self.node_budget = node_budget if node_budget is not None else settings.planning_node_budget
+        self.deterministic = deterministic if deterministic is not None else settings.planning_deterministic
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="planner")
+        self.local = threading.local()
+        self.last_searches = {}
+
+        self.ticks = 0
+        self.queries = 0
+        self.misses = 0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def close(self):
+        """Waits for running queries and shuts down the worker pool."""
+        self.executor.shutdown(wait=True)
+
+    def stats(self):
+        """Returns query, miss and planning latency counters."""
+        return {
+            "ticks": self.ticks,
+            "queries": self.queries,
+            "misses": self.misses,
+            "miss_rate": self.misses / self.queries if self.queries else 0.0,
+            "max_latency": self.max_latency,
+            "mean_latency": self.total_latency / self.ticks if self.ticks else 0.0,
+        }
+
+    def _workspace(self, width, height):
+        """Returns this worker thread's own workspace for a grid size."""
+        workspaces = getattr(self.local, "workspaces", None)
+        if workspaces is None:
+            workspaces = self.local.workspaces = {}
+        workspace = workspaces.get((width, height))
+        if workspace is None:
+            workspace = workspaces[(width, height)] = SearchWorkspace(width, height)
+        return workspace
+
+    def _search(self, board, algorithm_name, start, end, deadline):
+        """Runs one bounded search on a worker; returns (path, truncated, (seconds, expanded, pushes))."""
+        started = perf_counter()
+        if not self.deterministic and started >= deadline:
+            return None, True, (0.0, 0, 0)
+        workspace = self._workspace(board.width, board.height)
+        if self.deterministic:
+            workspace.budget, workspace.deadline = self.node_budget, None
+        else:
+            workspace.budget, workspace.deadline = None, deadline
+        search = getattr(workspace, SEARCH_METHODS.get(algorithm_name, "dijkstra"))
+        path = search(board, start, end)
+        return path, workspace.truncated, (perf_counter() - started, workspace.expanded, workspace.pushes)
+
+    def plan(self, occupancy, snakes, food_pos):
+        """Plans the given snakes toward the food; returns {snake id: path or None}.
+
+        Snakes whose search was cut short get their fallback path instead. The
+        time and search counters of each query are kept in last_searches.
+        """
+        started = perf_counter()
+        deadline = started + self.tick_budget
+        futures = [
+            (snake, self.executor.submit(self._search, occupancy, snake.algorithm_name, snake.body[0], food_pos, deadline))
+            for snake in snakes
+        ]
+        paths = {}
+        self.last_searches = {}
+        for snake, future in futures:
+            path, truncated, self.last_searches[snake.id] = future.result()
+            if truncated:
+                self.misses += 1
+                path = snake.fallback_path(occupancy)
+            paths[snake.id] = path
+
+        latency = perf_counter() - started
+        self.ticks += 1
+        self.queries += len(futures)
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        return paths
@@ -1,27 +1,64 @@
 class GameSettings:
     """Encapsulates game settings and constants."""
     def __init__(self):
-        self.grid_sizes = {"Small": 20, "Medium": 30, "Large": 40}
+        self.grid_sizes = {"Small": 20, "Medium": 30, "Large": 40, "Huge": 200, "Giant": 1000}
         self.selected_grid_size_name = "Medium" 
 
         self.cell_size = 15
+        self.max_window_size = 900
+        self.zoom_levels = [1, 2, 3, 4, 6, 8, 10, 15, 20, 30]
+        self.camera_pan_step = 10
+        self.minimap_size = 160
+        self.minimap_interval = 15
         self.snake_colors_options = [(255, 0, 0), (255, 255, 0), (255, 255, 255), (255, 105, 180)]
         self.selected_snake_colors_indices = [0, 1, 2, 3]
         self.food_color = (255, 255, 255)
         self.background_color = (0, 0, 0)
         self.grid_color = (100, 100, 100)
-        self.fps = 15
+        self.fps = 60
+        self.tick_rate_options = [1, 5, 15, 30, 60, 120, 240, 480, 960]
+        self.selected_tick_rate_index = 2
+        self.turbo = False
+        self.frame_tick_budget = 0.8
+        self.max_ticks_per_frame = 8
         self.initial_snake_length = 3
-        self.num_snakes_options = [4]
-        self.selected_num_snakes_index = 0
-        self.pathfinding_algorithms = ["Dijkstra", "A*", "BFS"]
+        self.num_snakes_options = [2, 4, 8, 16, 64, 128, 256]
+        self.selected_num_snakes_index = 1
+        self.collision_modes = ["sequential", "simultaneous"]
+        self.collision_mode = "sequential"
+        self.hud_max_snakes = 8
+        self.pathfinding_algorithms = ["Dijkstra", "A*", "BFS", "JPS"]
         self.selected_algorithm_indices = [0, 1, 0, 1]
+        self.search_backends = ["python", "numpy"]
+        self.search_backend = "python"
+        self.concurrent_planning = False
+        self.planning_workers = 4
+        self.planning_tick_budget = 0.010
+        self.planning_node_budget = 20000
+        self.planning_deterministic = False
+        self.planning_modes = ["search", "field", "cached"]
+        self.planning_mode = "search"
+        self.instrumentation_trace_path = None
+        self.replay_record_dir = None
+        self.replay_keyframe_interval = 100
+        self.replay_seek_step = 100
+        self.batch_env_max_ticks = 1000
+        self.safety_algorithms = []
+        self.safety_flood_limit = 256
+        self.spectator_host = "127.0.0.1"
+        self.spectator_port = None
+        self.spectator_snapshot_interval = 100
+        self.spectator_queue_size = 512
         self.menu_snake_algorithm_index = 0
 
     @property
     def grid_size(self):
         return self.grid_sizes[self.selected_grid_size_name]
 
+    @property
+    def tick_rate(self):
+        return self.tick_rate_options[self.selected_tick_rate_index]
+
     @property
     def num_snakes(self):
         return self.num_snakes_options[self.selected_num_snakes_index]
@@ -44,5 +81,5 @@ BACKGROUND_COLOR = settings.background_color
 GRID_COLOR = settings.grid_color
 FPS = settings.fps
 INITIAL_SNAKE_LENGTH = settings.initial_snake_length
-NUM_SNAKES = 4
+NUM_SNAKES = settings.num_snakes
 SNAKE_COLORS = settings.selected_snake_colors
@@ -0,0 +1,220 @@
+import math
+import random
+from src.occupancy import OccupancyGrid
+from src.pathfinding import DistanceField
+from src.replanning import IncrementalPlanner
+from src.safety import SafetyEvaluator
+from src.settings import settings
+from src.snake import Snake
+from src.utils import generate_food, snake_colors
+from src.vectorized import batch_paths
+
+
+def start_positions(size, count):
+    """Returns non-overlapping start cells, or None if they must be drawn at random.
+
+    Up to four snakes start in the classic corners; more are spread over an
+    evenly spaced lattice with at least one free cell between neighbors.
+    """
+    if count <= 4 and size >= 12:
+        return [(5, 5), (size - 6, size - 6), (5, size - 6), (size - 6, 5)][:count]
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    step_x, step_y = (size - 1) // (columns + 1), (size - 1) // (rows + 1)
+    if min(step_x, step_y) < 2:
+        return None
+    return [(step_x * (i % columns + 1), step_y * (i // columns + 1)) for i in range(count)]
+
+
+class Simulator:
+    """Pure-logic snake game core with no pygame dependency."""
+
+    def __init__(self, grid_size=None, algorithms=None, colors=None, num_snakes=None, planning_mode=None,
+                 collision_mode=None, backends=None, scheduler=None, seed=None, safety_algorithms=None):
+        """Initializes the simulator; arguments left as None come from the settings.
+
+        planning_mode: "search", "field" (one shared distance field) or "cached".
+        collision_mode: "sequential" or "simultaneous" (always used with a scheduler).
+        seed: seeds all game randomness, so a game replays from settings and seed.
+        safety_algorithms: algorithms whose snakes flood-fill check their moves.
+        """
+        self.grid_size = grid_size if grid_size is not None else settings.grid_size
+        self.num_snakes = num_snakes if num_snakes is not None else settings.num_snakes
+        self.algorithms = list(algorithms) if algorithms is not None else settings.selected_algorithms
+        self.colors = list(colors) if colors is not None else snake_colors(self.num_snakes)
+        self.planning_mode = planning_mode if planning_mode is not None else settings.planning_mode
+        self.collision_mode = collision_mode if collision_mode is not None else settings.collision_mode
+        self.backends = list(backends) if backends is not None else [settings.search_backend]
+        self.scheduler = scheduler
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.safety_algorithms = list(safety_algorithms) if safety_algorithms is not None else settings.safety_algorithms
+        self.instrumentation = None
+        self.reset()
+
+    def reset(self):
+        """Rebuilds the walled occupancy grid, the snakes and the first food item."""
+        size = self.grid_size
+        self.rng = random.Random(self.seed)
+        self.occupancy = OccupancyGrid.walled(size)
+        self.safety = SafetyEvaluator(size, size) if self.safety_algorithms else None
+
+        self.snakes = []
+        start_positions = self._start_positions()
+        for i in range(self.num_snakes):
+            if start_positions is not None:
+                start_pos = start_positions[i]
+            else:
+                start_pos = self.occupancy.random_free_cell(self.rng)
+                if start_pos is None:
+                    raise ValueError(f"no room for {self.num_snakes} snakes on a {size}x{size} grid")
+            snake = Snake(start_pos, self.colors[i % len(self.colors)], i,
+                          self.algorithms[i % len(self.algorithms)], size,
+                          self.backends[i % len(self.backends)], self.rng)
+            for segment in snake.body:
+                self.occupancy.occupy(segment)
+            if self.planning_mode == "cached":
+                snake.planner = IncrementalPlanner(size, size)
+            if snake.algorithm_name in self.safety_algorithms:
+                snake.safety = self.safety
+            self.snakes.append(snake)
+
+        self.food_pos = self._spawn_food()
+        self.food_field = DistanceField(size, size) if self.planning_mode == "field" else None
+        self.death_ticks = {}
+        self.tick = 0
+        self.board_full = self.food_pos is None
+        self.game_over = self.board_full
+
+    def _start_positions(self):
+        return start_positions(self.grid_size, self.num_snakes)
+
+    @property
+    def alive_snakes(self):
+        return [snake for snake in self.snakes if snake.is_alive]
+
+    def survival_ticks(self, snake):
+        """Returns how many ticks the snake has survived so far."""
+        return self.death_ticks.get(snake.id, self.tick)
+
+    def planner_stats(self):
+        """Sums the incremental planner counters over all snakes (cached mode only)."""
+        totals = {}
+        for snake in self.snakes:
+            if snake.planner is not None:
+                for key, value in snake.planner.stats().items():
+                    totals[key] = totals.get(key, 0) + value
+        if totals.get("plans"):
+            totals["cache_hit_rate"] = totals["cache_hits"] / totals["plans"]
+        return totals
+
+    def safety_stats(self):
+        """Returns the shared safety evaluator's counters (empty without one)."""
+        return self.safety.stats() if self.safety is not None else {}
+
+    def _spawn_food(self):
+        return generate_food(self.occupancy, self.rng)
+
+    def step(self):
+        """Advances the game by one tick and returns whether it is over."""
+        if self.game_over:
+            return True
+
+        field = self.food_field
+        if field is not None:
+            field.build(self.occupancy, self.food_pos)
+
+        if self.collision_mode == "simultaneous" or self.scheduler is not None:
+            food_eaten_by_any_snake = self._step_simultaneous(field)
+        else:
+            food_eaten_by_any_snake = False
+            for snake in self.snakes:
+                if snake.is_alive:
+                    food_eaten = snake.move(self.occupancy, self.food_pos, field)
+                    if food_eaten:
+                        food_eaten_by_any_snake = True
+                    if not snake.is_alive:
+                        self.death_ticks[snake.id] = self.tick
+
+        if food_eaten_by_any_snake:
+            self.food_pos = self._spawn_food()
+            self.board_full = self.food_pos is None
+
+        self.tick += 1
+        if len(self.alive_snakes) <= 1 or self.board_full:
+            self.game_over = True
+        return self.game_over
+
+    def _step_simultaneous(self, field):
+        """Plans every move against the tick-start board, then resolves them together."""
+        planned = []
+        targets = {}
+        batched = {}
+        if field is None:
+            batched = self._batch_paths([
+                snake for snake in self.snakes
+                if snake.is_alive and snake.backend == "numpy" and snake.planner is None
+            ])
+            if self.scheduler is not None:
+                batched.update(self._scheduled_paths([
+                    snake for snake in self.snakes
+                    if snake.is_alive and snake.backend == "python" and snake.planner is None
+                ]))
+        for snake in self.snakes:
+            if snake.is_alive:
+                if snake.id in batched:
+                    next_pos = snake.follow_path(self.occupancy, batched[snake.id])
+                else:
+                    next_pos = snake.plan_move(self.occupancy, self.food_pos, field)
+                if next_pos:
+                    planned.append((snake, next_pos))
+                    targets[next_pos] = targets.get(next_pos, 0) + 1
+                else:
+                    self.death_ticks[snake.id] = self.tick
+        return self._resolve_moves(planned, targets)
+
+    def _batch_paths(self, snakes):
+        """Plans every given snake toward the food with one vectorized call; returns {id: path}."""
+        if not snakes:
+            return {}
+        paths = batch_paths(self.occupancy, [(snake.body[0], self.food_pos) for snake in snakes])
+        return {snake.id: path for snake, path in zip(snakes, paths)}
+
+    def _scheduled_paths(self, snakes):
+        """Plans the given snakes concurrently through the scheduler; returns {id: path}."""
+        if not snakes:
+            return {}
+        return self.scheduler.plan(self.occupancy, snakes, self.food_pos)
+
+    def _resolve_moves(self, planned, targets):
+        """Applies planned head moves at once and returns whether food was eaten.
+
+        targets counts the snakes heading into each cell, so head-to-head
+        collisions are found with one dict lookup per snake and body collisions
+        with one occupancy lookup; all colliding snakes die together.
+        """
+        occupancy = self.occupancy
+        movers = []
+        for snake, next_pos in planned:
+            if targets[next_pos] > 1 or not occupancy.is_free(next_pos):
+                snake.is_alive = False
+                snake.death_cause = "collision"
+                self.death_ticks[snake.id] = self.tick
+            else:
+                movers.append((snake, next_pos))
+
+        food_eaten = False
+        for snake, next_pos in movers:
+            grow = next_pos == self.food_pos
+            if grow:
+                snake.score += 1
+                food_eaten = True
+            snake.advance(occupancy, next_pos, grow)
+        return food_eaten
+
+    def run_until_done(self, max_ticks=None):
+        """Steps until the game ends or max_ticks is reached; returns the tick count."""
+        while not self.game_over:
+            if max_ticks is not None and self.tick >= max_ticks:
+                break
+            self.step()
+        return self.tick
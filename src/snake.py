@@ -1,87 +1,266 @@
+import random
+from array import array
+from src.settings import settings, INITIAL_SNAKE_LENGTH
+from src.pathfinding import dijkstra, astar, bfs, jps
+from src import vectorized
+
+
+# --- Snake Body ---
+class SnakeBody:
+    """Ring buffer of packed cell indices (y * width + x), ordered head to tail.
+
+    Head push and tail pop are O(1), and a per-cell segment count makes
+    membership tests O(1) without scanning or copying the body.
+    """
+
+    __slots__ = ("width", "cells", "mask", "start", "length", "counts")
+
+    def __init__(self, width, positions=()):
+        """Initializes the body from positions listed head first."""
+        capacity = 8
+        while capacity < len(positions):
+            capacity *= 2
+        self.width = width
+        self.cells = array('i', [0]) * capacity
+        self.mask = capacity - 1
+        self.start = 0
+        self.length = 0
+        self.counts = {}
+        for pos in reversed(positions):
+            self.push_head(pos)
+
+    def _grow(self):
+        """Doubles the capacity, unrolling the ring so the head sits at slot 0."""
+        cells, mask, start = self.cells, self.mask, self.start
+        unrolled = array('i', (cells[(start + i) & mask] for i in range(self.length)))
+        unrolled.extend(array('i', [0]) * len(unrolled))
+        self.cells = unrolled
+        self.mask = len(unrolled) - 1
+        self.start = 0
+
+    def push_head(self, pos):
+        """Adds a new head segment."""
+        if self.length > self.mask:
+            self._grow()
+        self.start = (self.start - 1) & self.mask
+        index = pos[1] * self.width + pos[0]
+        self.cells[self.start] = index
+        self.length += 1
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+
+    def pop_tail(self):
+        """Removes the tail segment and returns its position."""
+        self.length -= 1
+        index = self.cells[(self.start + self.length) & self.mask]
+        counts = self.counts
+        remaining = counts[index] - 1
+        if remaining:
+            counts[index] = remaining
+        else:
+            del counts[index]
+        return (index % self.width, index // self.width)
+
+    def count(self, pos):
+        """Returns how many segments occupy a position."""
+        return self.counts.get(pos[1] * self.width + pos[0], 0)
+
+    def __contains__(self, pos):
+        return pos[1] * self.width + pos[0] in self.counts
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        cells, mask, start, w = self.cells, self.mask, self.start, self.width
+        for i in range(self.length):
+            index = cells[(start + i) & mask]
+            yield (index % w, index // w)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(self.length))]
+        if item < 0:
+            item += self.length
+        if not 0 <= item < self.length:
+            raise IndexError("snake body index out of range")
+        index = self.cells[(self.start + item) & self.mask]
+        return (index % self.width, index // self.width)
+
+
 # --- Snake Class ---
 class Snake:
     """Represents a snake in the autonomous snake game."""
 
-    def __init__(self, start_pos, color, snake_id, algorithm_name):
-        """Initializes a snake object."""
-        self.body = [start_pos] * INITIAL_SNAKE_LENGTH
+    def __init__(self, start_pos, color, snake_id, algorithm_name, grid_width=None, backend=None, rng=None):
+        """Initializes a snake object.
+
+        backend "numpy" answers searches with the vectorized wavefront instead of
+        algorithm_name; it falls back to "python" when NumPy is not installed.
+        rng is the game's random.Random (the global random module by default).
+        """
+        if grid_width is None:
+            grid_width = settings.grid_size
+        if backend is None:
+            backend = settings.search_backend
+        if backend == "numpy" and not vectorized.HAS_NUMPY:
+            backend = "python"
+        self.rng = rng if rng is not None else random
+        self.body = SnakeBody(grid_width, [start_pos] * INITIAL_SNAKE_LENGTH)
         self.color = color
-        self.direction = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+        self.direction = self.rng.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
         self.id = snake_id
         self.score = 0
         self.is_alive = True
+        self.death_cause = None
         self.algorithm_name = algorithm_name
+        self.backend = backend
+        self.planner = None
+        self.safety = None
+        self.last_path = None
 
-    def move(self, grid, food_pos, snakes):
-        """Moves the snake based on pathfinding and game rules."""
+    def move(self, occupancy, food_pos, field=None):
+        """Moves the snake based on pathfinding and game rules.
+
+        When a shared distance field toward the food is given, the snake descends
+        it instead of running its own search. A snake with an incremental planner
+        attached reuses and repairs its previous plan instead.
+        """
         if not self.is_alive:
             return False
 
-        snake_bodies_obstacles = self._get_obstacle_positions(snakes)
-        path = self._find_path_to_food(grid, food_pos, snake_bodies_obstacles)
-        next_pos = self._determine_next_position(grid, path, snake_bodies_obstacles)
-
+        next_pos = self.plan_move(occupancy, food_pos, field)
         if not next_pos:
-            self.is_alive = False
             return False
 
-        self.body.insert(0, next_pos)
+        food_eaten = self._check_collisions_and_food(occupancy, next_pos, food_pos)
+        if not self.is_alive:
+            return False
 
-        food_eaten = self._check_collisions_and_food(grid, food_pos, snake_bodies_obstacles)
-        if not food_eaten:
-            self.body.pop()
+        self.advance(occupancy, next_pos, food_eaten)
         return food_eaten
 
-    def _get_obstacle_positions(self, snakes):
-        """Collects positions of other snakes' bodies as obstacles."""
-        snake_bodies_obstacles = set()
-        for other_snake in snakes:
-            if other_snake != self:
-                snake_bodies_obstacles.update(other_snake.body)
-        snake_bodies_obstacles.update(tuple(segment) for segment in self.body[1:])
-        return snake_bodies_obstacles
-
-    def _find_path_to_food(self, grid, food_pos, obstacles):
-        """Finds a path to food using the selected pathfinding algorithm."""
+    def plan_move(self, occupancy, food_pos, field=None):
+        """Plans toward the food and chooses the next head position without moving."""
+        return self.follow_path(occupancy, self._find_path_to_food(occupancy, food_pos, field))
+
+    def follow_path(self, occupancy, path):
+        """Chooses the next head position from an already planned path.
+
+        Returns None and marks the snake as trapped when no move is possible.
+        """
+        self.last_path = path
+        next_pos = self._determine_next_position(occupancy, path)
+        if not next_pos:
+            self.is_alive = False
+            self.death_cause = "trapped"
+            return None
+        return next_pos
+
+    def fallback_path(self, occupancy):
+        """Returns the rest of the previous plan from the current head if its next cell is free."""
+        path = self.last_path
+        head = self.body[0]
+        if not path or head not in path:
+            return None
+        rest = path[path.index(head):]
+        if len(rest) < 2 or not occupancy.is_free(rest[1]):
+            return None
+        return rest
+
+    def advance(self, occupancy, next_pos, grow):
+        """Moves the head to next_pos, keeping the tail when the snake grows."""
+        self.body.push_head(next_pos)
+        occupancy.occupy(next_pos)
+        if not grow:
+            occupancy.release(self.body.pop_tail())
+
+    def _find_path_to_food(self, occupancy, food_pos, field=None):
+        """Finds a path to food using the shared field or the selected pathfinding algorithm."""
+        if field is not None:
+            return field.path_from(occupancy, self.body[0])
+        if self.planner is not None:
+            return self.planner.plan(occupancy, self.body[0], food_pos)
+        if self.backend == "numpy":
+            return vectorized.wavefront_bfs(occupancy, self.body[0], food_pos)
         algorithm_name = self.algorithm_name
         if algorithm_name == "Dijkstra":
-            return dijkstra(grid, self.body[0], food_pos, obstacles)
+            return dijkstra(occupancy, self.body[0], food_pos)
         elif algorithm_name == "A*":
-            return astar(grid, self.body[0], food_pos, obstacles)
+            return astar(occupancy, self.body[0], food_pos)
         elif algorithm_name == "BFS":
-            return bfs(grid, self.body[0], food_pos, obstacles)
+            return bfs(occupancy, self.body[0], food_pos)
+        elif algorithm_name == "JPS":
+            return jps(occupancy, self.body[0], food_pos)
         else:
-            return dijkstra(grid, self.body[0], food_pos, obstacles)
+            return dijkstra(occupancy, self.body[0], food_pos)
+
+    def _determine_next_position(self, occupancy, path):
+        """Determines the next position based on path or survival moves.
 
-    def _determine_next_position(self, grid, path, obstacles):
-        """Determines the next position based on path or survival moves."""
-        if path and len(path) > 1:
+        With a safety evaluator attached, a path step that would leave the snake
+        boxed in is replaced by the roomiest survival move.
+        """
+        if path and len(path) > 1 and (self.safety is None or self._is_roomy(occupancy, path[1])):
             next_pos = path[1]
             self.direction = (next_pos[0] - self.body[0][0], next_pos[1] - self.body[0][1])
             return next_pos
         else:
-            return self._survival_move(grid, obstacles)
+            return self._survival_move(occupancy)
+
+    def _room(self, occupancy, pos):
+        """Scores moving the head to pos as (safe, area) with the safety evaluator.
+
+        A move is safe when it keeps the tail reachable or leaves at least as many
+        free cells as the snake is long (capped at settings.safety_flood_limit).
+        """
+        limit = min(len(self.body), settings.safety_flood_limit)
+        area, tail_reachable = self.safety.evaluate(occupancy, pos, self.body[-1], limit)
+        return tail_reachable or area >= limit, area
+
+    def _is_roomy(self, occupancy, pos):
+        return occupancy.is_free(pos) and self._room(occupancy, pos)[0]
 
-    def _survival_move(self, grid, obstacles):
-        """Attempts to make a safe move when no path to food is found."""
+    def _survival_move(self, occupancy):
+        """Attempts to make a safe move when no path to food is found.
+
+        With a safety evaluator attached, the free neighbor with the best room
+        score is taken instead of the first one.
+        """
         possible_directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        random.shuffle(possible_directions)
+        self.rng.shuffle(possible_directions)
+        if self.safety is not None:
+            return self._roomiest_move(occupancy, possible_directions)
         for dir_option in possible_directions:
             test_pos = (self.body[0][0] + dir_option[0], self.body[0][1] + dir_option[1])
-            if self._is_safe_position(grid, test_pos, obstacles):
+            if self._is_safe_position(occupancy, test_pos):
                 self.direction = dir_option
                 return test_pos
         return None
 
-    def _is_safe_position(self, grid, pos, obstacles):
-        """Checks if a position is safe (within bounds, not wall/obstacle)."""
-        return is_valid_pos(pos) and grid[pos[1]][pos[0]] == 0 and pos not in obstacles
+    def _roomiest_move(self, occupancy, directions):
+        """Returns the free neighbor with the best room score, trying directions in order."""
+        best, best_room = None, None
+        for dir_option in directions:
+            test_pos = (self.body[0][0] + dir_option[0], self.body[0][1] + dir_option[1])
+            if self._is_safe_position(occupancy, test_pos):
+                room = self._room(occupancy, test_pos)
+                if best_room is None or room > best_room:
+                    best, best_room = dir_option, room
+        if best is None:
+            return None
+        self.direction = best
+        return (self.body[0][0] + best[0], self.body[0][1] + best[1])
+
+    def _is_safe_position(self, occupancy, pos):
+        """Checks if a position is safe (within bounds, not wall/snake segment)."""
+        return occupancy.is_free(pos)
 
-    def _check_collisions_and_food(self, grid, food_pos, obstacles):
-        """Checks for collisions and if food is eaten."""
-        head_pos = self.body[0]
-        if not self._is_safe_position(grid, head_pos, obstacles) or head_pos in self.body[1:]:
+    def _check_collisions_and_food(self, occupancy, head_pos, food_pos):
+        """Checks the new head position for collisions and if food is eaten."""
+        if not self._is_safe_position(occupancy, head_pos) or head_pos in self.body:
             self.is_alive = False
+            self.death_cause = "collision"
             return False
 
         if head_pos == food_pos:
@@ -89,4 +268,3 @@ class Snake:
             return True
         else:
             return False
-
@@ -0,0 +1,475 @@
+"""Streams live games to remote viewers over TCP.
+
+Usage:
+    python -m src.spectator serve --port 8765 --grid-size 40 --snakes 8
+    python -m src.spectator watch --host 192.168.1.20 --port 8765
+
+Set settings.spectator_port to stream the games played in the window instead.
+
+Every message is a frame: u32 payload length, u8 kind, payload (little-endian).
+    HEADER      JSON game settings (as in a replay header); a new game starts
+    SNAPSHOT    full state, encoded like a replay keyframe
+    DELTA       u32 tick, u8 food flag (+ u32 cell when food spawned),
+                u16 moves of (u16 snake, u32 new head, u32 removed tail or
+                NO_CELL when it grew), u16 deaths of (u16 snake, u8 cause),
+                u16 scores of (u16 snake, u32 score)
+A new or resynced viewer gets the header, the latest snapshot and the deltas
+since, so a delta costs a few bytes per moving snake whatever the board size.
+"""
+import argparse
+import asyncio
+import json
+import struct
+import threading
+import time
+from src.replay import (
+    DEATH_CODES, DEATHS, FOOD_GONE, FOOD_SPAWNED, FOOD_UNCHANGED, NO_FOOD, decode_keyframe, encode_keyframe,
+    header_for,
+)
+from src.settings import settings, BACKGROUND_COLOR, FPS
+from src.simulation import Simulator
+
+try:
+    import pygame
+    from src.drawing import draw_cell, draw_food, draw_grid, draw_snake
+except ImportError:  # only the viewer window needs pygame
+    pygame = None
+
+HEADER, SNAPSHOT, DELTA = b"H", b"S", b"D"
+NO_CELL = NO_FOOD
+
+_FRAME = struct.Struct("<Ic")
+_DELTA = struct.Struct("<IB")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_MOVE = struct.Struct("<HII")
+_DEATH = struct.Struct("<HB")
+_SCORE = struct.Struct("<HI")
+
+
+def frame(kind, payload):
+    """Prefixes a payload with its length and kind."""
+    return _FRAME.pack(len(payload), kind) + payload
+
+
+class DeltaEncoder:
+    """Diffs a simulator against its state at the previous tick."""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.capture()
+
+    def capture(self):
+        """Remembers the heads, tails, lengths, liveness, scores and food."""
+        simulator = self.simulator
+        self.tick = simulator.tick
+        self.heads = [snake.body[0] for snake in simulator.snakes]
+        self.tails = [snake.body[-1] for snake in simulator.snakes]
+        self.lengths = [len(snake.body) for snake in simulator.snakes]
+        self.alive = [snake.is_alive for snake in simulator.snakes]
+        self.scores = [snake.score for snake in simulator.snakes]
+        self.food_pos = simulator.food_pos
+
+    def encode(self):
+        """Returns the DELTA payload since the last capture, then captures again."""
+        simulator = self.simulator
+        size = simulator.grid_size
+        moves, deaths, scores = [], [], []
+        for i, snake in enumerate(simulator.snakes):
+            if not self.alive[i]:
+                continue
+            if not snake.is_alive:
+                deaths.append(_DEATH.pack(i, DEATH_CODES.get(snake.death_cause, DEATH_CODES["collision"])))
+            else:
+                x, y = snake.body[0]
+                if (x, y) != self.heads[i]:
+                    grew = len(snake.body) > self.lengths[i]
+                    tail = NO_CELL if grew else self.tails[i][1] * size + self.tails[i][0]
+                    moves.append(_MOVE.pack(i, y * size + x, tail))
+            if snake.score != self.scores[i]:
+                scores.append(_SCORE.pack(i, snake.score))
+
+        parts = []
+        if simulator.food_pos == self.food_pos:
+            parts.append(_DELTA.pack(simulator.tick, FOOD_UNCHANGED))
+        elif simulator.food_pos is None:
+            parts.append(_DELTA.pack(simulator.tick, FOOD_GONE))
+        else:
+            x, y = simulator.food_pos
+            parts.append(_DELTA.pack(simulator.tick, FOOD_SPAWNED) + _U32.pack(y * size + x))
+        for records in (moves, deaths, scores):
+            parts.append(_U16.pack(len(records)))
+            parts.extend(records)
+        self.capture()
+        return b"".join(parts)
+
+
+def apply_delta(state, payload):
+    """Applies a DELTA payload to a ReplayState.
+
+    Returns (cells to repaint, food moved) or None when the delta does not
+    follow the state's tick.
+    """
+    tick, flag = _DELTA.unpack_from(payload, 0)
+    if tick != state.tick + 1:
+        return None
+    offset = _DELTA.size
+    size = state.grid_size
+    if flag == FOOD_SPAWNED:
+        (food,) = _U32.unpack_from(payload, offset)
+        offset += 4
+        food_pos = (food % size, food // size)
+    else:
+        food_pos = None if flag == FOOD_GONE else state.food_pos
+
+    changed = []
+    (count,) = _U16.unpack_from(payload, offset)
+    offset += 2
+    for _ in range(count):
+        number, head, tail = _MOVE.unpack_from(payload, offset)
+        offset += _MOVE.size
+        snake = state.snakes[number]
+        snake.advance(state.occupancy, (head % size, head // size), tail == NO_CELL)
+        changed.append(snake.body[0])
+        if tail != NO_CELL:
+            changed.append((tail % size, tail // size))
+    (count,) = _U16.unpack_from(payload, offset)
+    offset += 2
+    for _ in range(count):
+        number, cause = _DEATH.unpack_from(payload, offset)
+        offset += _DEATH.size
+        snake = state.snakes[number]
+        snake.is_alive = False
+        snake.death_cause = DEATHS.get(cause)
+        changed.extend(snake.body)
+    (count,) = _U16.unpack_from(payload, offset)
+    offset += 2
+    for _ in range(count):
+        number, score = _SCORE.unpack_from(payload, offset)
+        offset += _SCORE.size
+        state.snakes[number].score = score
+
+    food_moved = food_pos != state.food_pos
+    if food_moved and state.food_pos is not None:
+        changed.append(state.food_pos)
+    state.food_pos = food_pos
+    state.tick = tick
+    return changed, food_moved
+
+
+class _Viewer:
+    """One connected spectator: its socket writer and bounded outgoing queue."""
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(queue_size)
+        self.stale = False
+        self.task = asyncio.current_task()
+
+
+class SpectatorServer:
+    """Broadcasts a running game to TCP viewers from a background asyncio thread.
+
+    The simulation thread calls publish() after every tick; it only encodes
+    the delta and hands the frame to the event loop, so it never waits on the
+    network. Each viewer has a bounded queue: a viewer that falls behind has
+    its queue dropped and is resynced with the next snapshot, so one slow
+    connection never stalls the simulation or the other viewers.
+    """
+
+    def __init__(self, host=None, port=None, snapshot_interval=None, queue_size=None):
+        """Initializes the server from the spectator settings unless overridden; call start() to listen."""
+        self.host = host if host is not None else settings.spectator_host
+        self.port = port if port is not None else settings.spectator_port
+        self.snapshot_interval = snapshot_interval or settings.spectator_snapshot_interval
+        self.queue_size = queue_size or settings.spectator_queue_size
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.viewers = set()
+        self.simulator = None
+        self.encoder = None
+        self.header_frame = None
+        self.snapshot_frame = None
+        self.backlog = []
+
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.resyncs = 0
+
+    def start(self):
+        """Starts the event loop thread and returns once the server is listening."""
+        ready = threading.Event()
+        failure = []
+        self.loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.server = self.loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+            except OSError as error:
+                failure.append(error)
+                ready.set()
+                return
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="spectator", daemon=True)
+        self.thread.start()
+        ready.wait()
+        if failure:
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+            raise failure[0]
+        return self
+
+    def close(self):
+        """Disconnects every viewer and stops the event loop thread."""
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+
+    async def _shutdown(self):
+        self.server.close()
+        tasks = [viewer.task for viewer in self.viewers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def stats(self):
+        """Returns viewer, traffic and resync counters."""
+        return {
+            "viewers": len(self.viewers),
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "resyncs": self.resyncs,
+        }
+
+    def publish(self, simulator):
+        """Queues the frames describing the simulator's latest tick (or a new game) for every viewer."""
+        if simulator is not self.simulator or simulator.tick < self.encoder.tick:
+            self.simulator = simulator
+            self.encoder = DeltaEncoder(simulator)
+            header = json.dumps(header_for(simulator, self.snapshot_interval)).encode()
+            frames = [(HEADER, frame(HEADER, header)), (SNAPSHOT, frame(SNAPSHOT, encode_keyframe(simulator)))]
+        elif simulator.tick == self.encoder.tick:
+            return
+        elif simulator.tick > self.encoder.tick + 1:
+            self.encoder.capture()
+            frames = [(SNAPSHOT, frame(SNAPSHOT, encode_keyframe(simulator)))]
+        else:
+            frames = [(DELTA, frame(DELTA, self.encoder.encode()))]
+            if simulator.tick % self.snapshot_interval == 0:
+                frames.append((SNAPSHOT, frame(SNAPSHOT, encode_keyframe(simulator))))
+        self.loop.call_soon_threadsafe(self._broadcast, frames)
+
+    def _broadcast(self, frames):
+        for kind, data in frames:
+            if kind == HEADER:
+                self.header_frame = data
+            elif kind == SNAPSHOT:
+                self.snapshot_frame = data
+                self.backlog.clear()
+            else:
+                self.backlog.append(data)
+            for viewer in list(self.viewers):
+                if not viewer.stale:
+                    self._offer(viewer, data)
+                elif kind == SNAPSHOT:
+                    viewer.stale = False
+                    self._catch_up(viewer)
+
+    def _offer(self, viewer, data):
+        """Queues a frame for a viewer, marking it stale and dropping its queue when full."""
+        try:
+            viewer.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            viewer.stale = True
+            self.resyncs += 1
+            while not viewer.queue.empty():
+                viewer.queue.get_nowait()
+
+    def _catch_up(self, viewer):
+        """Queues the header, latest snapshot and the deltas since for a new or resynced viewer."""
+        if self.header_frame is None:
+            return
+        for data in [self.header_frame, self.snapshot_frame] + self.backlog:
+            self._offer(viewer, data)
+            if viewer.stale:
+                return
+
+    async def _serve(self, reader, writer):
+        viewer = _Viewer(writer, self.queue_size)
+        self.viewers.add(viewer)
+        self._catch_up(viewer)
+        try:
+            while True:
+                data = await viewer.queue.get()
+                writer.write(data)
+                await writer.drain()
+                self.frames_sent += 1
+                self.bytes_sent += len(data)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+
+
+async def read_frames(reader):
+    """Yields (kind, payload) for every frame read from a spectator stream."""
+    while True:
+        try:
+            length, kind = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+            payload = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return
+        yield kind, payload
+
+
+class SpectatorClient:
+    """Lightweight pygame viewer that draws a spectator stream with the src.drawing helpers.
+
+    A snapshot repaints the whole board; a delta only repaints the cells it
+    names, so drawing cost follows the stream rather than the board size.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.header = None
+        self.state = None
+        self.screen = None
+        self.cell_size = settings.cell_size
+        self.dirty = []
+        self.running = True
+
+    async def run(self):
+        """Connects, then reads frames and draws until the window closes or the stream ends."""
+        pygame.init()
+        pygame.display.set_caption(f"Spectating {self.host}:{self.port}")
+        self.screen = pygame.display.set_mode((settings.max_window_size // 2, settings.max_window_size // 2))
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        drawing = asyncio.ensure_future(self._draw_loop())
+        try:
+            async for kind, payload in read_frames(reader):
+                self._receive(kind, payload)
+                if not self.running:
+                    break
+        finally:
+            self.running = False
+            writer.close()
+            await drawing
+            pygame.quit()
+
+    def _receive(self, kind, payload):
+        if kind == HEADER:
+            self.header = json.loads(payload)
+            size = self.header["grid_size"]
+            self.cell_size = max(1, min(settings.cell_size, settings.max_window_size // size))
+            self.screen = pygame.display.set_mode((size * self.cell_size, size * self.cell_size))
+            self.state = None
+        elif kind == SNAPSHOT and self.header is not None:
+            self.state = decode_keyframe(self.header, payload)[0]
+            self._draw_full()
+        elif kind == DELTA and self.state is not None:
+            applied = apply_delta(self.state, payload)
+            if applied is not None:
+                self._draw_cells(*applied)
+
+    def _draw_full(self):
+        self.screen.fill(BACKGROUND_COLOR)
+        draw_grid(self.screen, self.state.grid_size, self.cell_size)
+        for snake in self.state.snakes:
+            if snake.is_alive:
+                draw_snake(self.screen, snake, self.cell_size)
+        if self.state.food_pos is not None:
+            draw_food(self.screen, self.state.food_pos, self.cell_size)
+        self.dirty = [self.screen.get_rect()]
+
+    def _draw_cells(self, cells, food_moved):
+        colors = {}
+        for snake in self.state.snakes:
+            if snake.is_alive:
+                for pos in cells:
+                    if pos in snake.body:
+                        colors[pos] = snake.color
+        for pos in cells:
+            color = colors.get(pos)
+            if color is not None:
+                self.dirty.append(draw_cell(self.screen, pos, color, self.cell_size))
+            else:
+                self.dirty.append(self._erase_cell(pos))
+        if food_moved and self.state.food_pos is not None:
+            self.dirty.append(draw_food(self.screen, self.state.food_pos, self.cell_size))
+
+    def _erase_cell(self, pos):
+        """Repaints a cell as empty board, including the grid lines along its top and left edges."""
+        rect = draw_cell(self.screen, pos, BACKGROUND_COLOR, self.cell_size)
+        pygame.draw.line(self.screen, settings.grid_color, rect.topleft, (rect.right - 1, rect.top), 1)
+        pygame.draw.line(self.screen, settings.grid_color, rect.topleft, (rect.left, rect.bottom - 1), 1)
+        return rect
+
+    async def _draw_loop(self):
+        while self.running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.running = False
+            if self.dirty:
+                pygame.display.update(self.dirty)
+                self.dirty = []
+            await asyncio.sleep(1 / FPS)
+
+
+def serve(simulator_factory, server, tick_rate, max_games=None):
+    """Runs headless games back to back at tick_rate ticks per second, publishing every tick."""
+    games = 0
+    while max_games is None or games < max_games:
+        simulator = simulator_factory()
+        server.publish(simulator)
+        while not simulator.game_over:
+            started = time.perf_counter()
+            simulator.step()
+            server.publish(simulator)
+            time.sleep(max(0.0, 1 / tick_rate - (time.perf_counter() - started)))
+        games += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream live games to spectators or watch a stream.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run headless games and stream them")
+    serve_parser.add_argument("--host", default=settings.spectator_host)
+    serve_parser.add_argument("--port", type=int, default=settings.spectator_port or 8765)
+    serve_parser.add_argument("--grid-size", type=int, default=settings.grid_size)
+    serve_parser.add_argument("--snakes", type=int, default=settings.num_snakes)
+    serve_parser.add_argument("--algorithms", nargs="+", default=settings.selected_algorithms)
+    serve_parser.add_argument("--tick-rate", type=float, default=settings.tick_rate)
+    watch_parser = commands.add_parser("watch", help="open a window on a stream")
+    watch_parser.add_argument("--host", default="127.0.0.1")
+    watch_parser.add_argument("--port", type=int, default=settings.spectator_port or 8765)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = SpectatorServer(args.host, args.port).start()
+        print(f"streaming on {server.host}:{server.port}")
+        try:
+            serve(lambda: Simulator(grid_size=args.grid_size, algorithms=args.algorithms, num_snakes=args.snakes),
+                  server, args.tick_rate)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+    else:
+        asyncio.run(SpectatorClient(args.host, args.port).run())
+
+
+if __name__ == "__main__":
+    main()
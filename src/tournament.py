@@ -0,0 +1,226 @@
+"""Plays every algorithm matchup over many seeds and reports the results.
+
+Usage: python -m src.tournament --seeds 100 --workers 8 --output report.json
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+from src.settings import settings
+from src.simulation import Simulator
+
+
+def play_game(task):
+    """Plays one headless game and returns its result record."""
+    algorithms, seed, grid_size, max_ticks = task
+    simulator = Simulator(grid_size=grid_size, algorithms=algorithms, num_snakes=len(algorithms), seed=seed)
+    simulator.run_until_done(max_ticks)
+
+    snakes = []
+    for snake in simulator.snakes:
+        snakes.append({
+            "algorithm": snake.algorithm_name,
+            "score": snake.score,
+            "survival_ticks": simulator.survival_ticks(snake),
+            "death_cause": snake.death_cause if not snake.is_alive else "survived",
+        })
+    return {
+        "algorithms": list(algorithms),
+        "seed": seed,
+        "grid_size": grid_size,
+        "max_ticks": max_ticks,
+        "ticks": simulator.tick,
+        "winner": _winner(snakes),
+        "snakes": snakes,
+    }
+
+
+def _winner(snakes):
+    """Returns the index of the top scorer (ties broken by survival), or None on a draw."""
+    ranking = sorted(range(len(snakes)), key=lambda i: (snakes[i]["score"], snakes[i]["survival_ticks"]), reverse=True)
+    best = ranking[0]
+    if len(ranking) > 1:
+        runner_up = ranking[1]
+        if (snakes[best]["score"], snakes[best]["survival_ticks"]) == (snakes[runner_up]["score"], snakes[runner_up]["survival_ticks"]):
+            return None
+    return best
+
+
+def _game_key(algorithms, seed, grid_size, max_ticks):
+    return "|".join(algorithms) + "#" + str(seed) + "@" + str(grid_size) + "/" + str(max_ticks)
+
+
+def load_checkpoint(path):
+    """Loads finished game records, skipping lines that were only partly written."""
+    results = []
+    if not path or not os.path.exists(path):
+        return results
+    with open(path) as checkpoint:
+        for line in checkpoint:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                continue
+    return results
+
+
+def _trim_partial_line(path):
+    """Cuts a partly written last record so appended records start on a fresh line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as checkpoint:
+        data = checkpoint.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            checkpoint.truncate(end)
+
+
+def run_tournament(algorithms, num_snakes, seeds, grid_size, max_ticks, workers=None, checkpoint_path=None):
+    """Plays every algorithm assignment for every seed, resuming from a checkpoint."""
+    wanted = {}
+    for assignment in itertools.product(algorithms, repeat=num_snakes):
+        for seed in seeds:
+            wanted[_game_key(assignment, seed, grid_size, max_ticks)] = (assignment, seed, grid_size, max_ticks)
+
+    results = []
+    for result in load_checkpoint(checkpoint_path):
+        key = _game_key(result["algorithms"], result["seed"], result["grid_size"], result.get("max_ticks"))
+        if wanted.pop(key, None) is not None:
+            results.append(result)
+
+    tasks = list(wanted.values())
+    if not tasks:
+        return results
+
+    if checkpoint_path:
+        _trim_partial_line(checkpoint_path)
+    checkpoint = open(checkpoint_path, "a") if checkpoint_path else None
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 16))
+            for result in pool.imap_unordered(play_game, tasks, chunksize=chunksize):
+                results.append(result)
+                if checkpoint:
+                    checkpoint.write(json.dumps(result) + "\n")
+                    checkpoint.flush()
+    finally:
+        if checkpoint:
+            checkpoint.close()
+    return results
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """Returns the Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return (0.0, 0.0)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+
+def _mean_interval(values, z=1.96):
+    """Returns the mean and its normal-approximation confidence half-width."""
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    mean = sum(values) / n
+    if n == 1:
+        return mean, 0.0
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+
+def summarize(results):
+    """Aggregates game records into per-algorithm and per-matchup statistics."""
+    per_algorithm = {}
+    for result in results:
+        for index, snake in enumerate(result["snakes"]):
+            entry = per_algorithm.setdefault(snake["algorithm"], {"wins": 0, "scores": [], "survival": [], "causes": {}})
+            entry["wins"] += result["winner"] == index
+            entry["scores"].append(snake["score"])
+            entry["survival"].append(snake["survival_ticks"])
+            entry["causes"][snake["death_cause"]] = entry["causes"].get(snake["death_cause"], 0) + 1
+
+    algorithms = []
+    for name, entry in sorted(per_algorithm.items()):
+        slots = len(entry["scores"])
+        low, high = wilson_interval(entry["wins"], slots)
+        score_mean, score_margin = _mean_interval(entry["scores"])
+        survival_mean, survival_margin = _mean_interval(entry["survival"])
+        algorithms.append({
+            "algorithm": name,
+            "slots": slots,
+            "wins": entry["wins"],
+            "win_rate": entry["wins"] / slots,
+            "win_rate_ci_low": low,
+            "win_rate_ci_high": high,
+            "mean_score": score_mean,
+            "mean_score_ci": score_margin,
+            "mean_survival_ticks": survival_mean,
+            "mean_survival_ticks_ci": survival_margin,
+            "death_causes": entry["causes"],
+        })
+
+    per_matchup = {}
+    for result in results:
+        entry = per_matchup.setdefault(tuple(result["algorithms"]), {"games": 0, "draws": 0, "slot_wins": [0] * len(result["algorithms"])})
+        entry["games"] += 1
+        if result["winner"] is None:
+            entry["draws"] += 1
+        else:
+            entry["slot_wins"][result["winner"]] += 1
+    matchups = [
+        {"algorithms": list(assignment), **entry}
+        for assignment, entry in sorted(per_matchup.items())
+    ]
+    return {"games": len(results), "algorithms": algorithms, "matchups": matchups}
+
+
+def write_report(summary, path):
+    """Writes the summary as CSV (per algorithm) or JSON depending on the extension."""
+    if path.endswith(".csv"):
+        fields = [
+            "algorithm", "slots", "wins", "win_rate", "win_rate_ci_low", "win_rate_ci_high",
+            "mean_score", "mean_score_ci", "mean_survival_ticks", "mean_survival_ticks_ci", "death_causes",
+        ]
+        with open(path, "w", newline="") as report:
+            writer = csv.DictWriter(report, fieldnames=fields)
+            writer.writeheader()
+            for row in summary["algorithms"]:
+                writer.writerow({**row, "death_causes": json.dumps(row["death_causes"], sort_keys=True)})
+    else:
+        with open(path, "w") as report:
+            json.dump(summary, report, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a multi-core algorithm tournament.")
+    parser.add_argument("--algorithms", nargs="+", default=settings.pathfinding_algorithms)
+    parser.add_argument("--snakes", type=int, default=settings.num_snakes)
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per matchup")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--grid-size", type=int, default=settings.grid_size)
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default="tournament_checkpoint.jsonl")
+    parser.add_argument("--output", default="tournament_report.json")
+    args = parser.parse_args(argv)
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    results = run_tournament(args.algorithms, args.snakes, seeds, args.grid_size, args.max_ticks,
+                             workers=args.workers, checkpoint_path=args.checkpoint)
+    summary = summarize(results)
+    write_report(summary, args.output)
+    for row in summary["algorithms"]:
+        print(f"{row['algorithm']}: win rate {row['win_rate']:.3f} "
+              f"[{row['win_rate_ci_low']:.3f}, {row['win_rate_ci_high']:.3f}], "
+              f"mean score {row['mean_score']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Optional NumPy wavefront search for large boards.
+
+Frontiers are expanded as whole-array operations on shifted boolean masks
+instead of one cell at a time. Everything here needs NumPy; check HAS_NUMPY
+first and fall back to the planners in src.pathfinding when it is missing.
+"""
+try:
+    import numpy as np
+except ImportError:  # the pure-Python planners are used instead
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+def free_mask(occupancy):
+    """Returns a (height, width) boolean array of the free cells."""
+    cells = np.frombuffer(occupancy.cells, dtype=np.uint8).reshape(occupancy.height, occupancy.width)
+    return cells == 0
+
+
+def wavefront(occupancy, sources, targets=None):
+    """Runs one breadth-first search per source, expanding all frontiers together.
+
+    Returns an int32 array of shape (len(sources), height, width) with the
+    distance of each free cell from its source, or -1 where it was not reached.
+    Only the bounding box the frontiers can have grown into is touched per step.
+    targets optionally lists (source_number, flat_index) pairs grouped by query
+    as a list of lists; expansion stops once every query has reached one of
+    its cells.
+    """
+    h, w = occupancy.height, occupancy.width
+    count = len(sources)
+    distance = np.full((count, h, w), -1, dtype=np.int32)
+    frontier = np.zeros((count, h, w), dtype=bool)
+    for number, (x, y) in enumerate(sources):
+        frontier[number, y, x] = True
+        distance[number, y, x] = 0
+    unvisited = np.broadcast_to(free_mask(occupancy), frontier.shape) & ~frontier
+    if count == 0:
+        return distance
+
+    if targets:
+        query_ids = np.array([q for q, cells in enumerate(targets) for _ in cells], dtype=np.intp)
+        target_sources = np.array([s for cells in targets for s, _ in cells], dtype=np.intp)
+        target_cells = np.array([i for cells in targets for _, i in cells], dtype=np.intp)
+        flat_distance = distance.reshape(count, h * w)
+    else:
+        query_ids = None
+
+    xs = [x for x, _ in sources]
+    ys = [y for _, y in sources]
+    left, right, top, bottom = min(xs), max(xs) + 1, min(ys), max(ys) + 1
+    step = 0
+    while True:
+        top, bottom = max(top - 1, 0), min(bottom + 1, h)
+        left, right = max(left - 1, 0), min(right + 1, w)
+        current = frontier[:, top:bottom, left:right]
+        if not current.any():
+            break
+        step += 1
+        grown = np.zeros_like(current)
+        grown[:, :, 1:] |= current[:, :, :-1]
+        grown[:, :, :-1] |= current[:, :, 1:]
+        grown[:, 1:, :] |= current[:, :-1, :]
+        grown[:, :-1, :] |= current[:, 1:, :]
+        window = unvisited[:, top:bottom, left:right]
+        grown &= window
+        window &= ~grown
+        distance[:, top:bottom, left:right][grown] = step
+        frontier[:, top:bottom, left:right] = grown
+
+        if query_ids is not None:
+            reached = np.zeros(len(targets), dtype=bool)
+            np.logical_or.at(reached, query_ids, flat_distance[target_sources, target_cells] >= 0)
+            if reached.all():
+                break
+    return distance
+
+
+def _descend(distance, start, goal, w, h):
+    """Reads a shortest path off a distance map built from goal, starting next to start."""
+    if start == goal:
+        return [start]
+    flat = distance.ravel()
+
+    def neighbors(x, y):
+        if x < w - 1:
+            yield x + 1, y
+        if x > 0:
+            yield x - 1, y
+        if y < h - 1:
+            yield x, y + 1
+        if y > 0:
+            yield x, y - 1
+
+    best, best_distance = None, None
+    for x, y in neighbors(*start):
+        value = int(flat[y * w + x])
+        if value >= 0 and (best_distance is None or value < best_distance):
+            best, best_distance = (x, y), value
+    if best is None:
+        return None
+    path = [start, best]
+    while best_distance > 0:
+        for x, y in neighbors(*best):
+            if flat[y * w + x] == best_distance - 1:
+                best, best_distance = (x, y), best_distance - 1
+                break
+        path.append(best)
+    return path
+
+
+def batch_paths(occupancy, queries):
+    """Answers many (start, goal) shortest-path queries against one board in one call.
+
+    Queries are grouped by goal, one reverse wavefront per distinct goal is
+    expanded for all of them at once, and each path is read off its goal's
+    distance map. Start cells may be occupied (a snake's own head); goals must
+    be free. Returns a path or None per query, in order.
+    """
+    w, h = occupancy.width, occupancy.height
+    goals = {}
+    for start, goal in queries:
+        if occupancy.in_bounds(start) and occupancy.is_free(goal) and goal not in goals:
+            goals[goal] = len(goals)
+
+    targets = []
+    for start, goal in queries:
+        number = goals.get(goal)
+        if number is None or start == goal or not occupancy.in_bounds(start):
+            continue
+        x, y = start
+        cells = [(number, ny * w + nx) for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                 if 0 <= nx < w and 0 <= ny < h]
+        if cells:
+            targets.append(cells)
+
+    maps = wavefront(occupancy, list(goals), targets)
+    paths = []
+    for start, goal in queries:
+        number = goals.get(goal)
+        if start == goal and occupancy.in_bounds(start):
+            paths.append([start])
+        elif number is None or not occupancy.in_bounds(start):
+            paths.append(None)
+        else:
+            paths.append(_descend(maps[number], start, goal, w, h))
+    return paths
+
+
+def wavefront_bfs(occupancy, start, end):
+    """Finds one shortest path with the NumPy wavefront."""
+    return batch_paths(occupancy, [(start, end)])[0]
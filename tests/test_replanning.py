@@ -0,0 +1,71 @@
+import random
+
+from src.occupancy import OccupancyGrid
+from src.pathfinding import get_workspace
+from src.replanning import IncrementalPlanner
+from src.simulation import Simulator
+
+
+def _assert_shortest(path, occupancy, start, goal):
+    expected = get_workspace(occupancy.width, occupancy.height).bfs(occupancy, start, goal)
+    assert (path is None) == (expected is None)
+    if path is not None:
+        assert len(path) == len(expected)
+        assert path[0] == start and path[-1] == goal
+
+
+def test_plans_stay_shortest_on_changing_random_boards():
+    """Replans, cache hits and repairs all match BFS while random cells flip."""
+    hits = repairs = 0
+    for seed in range(40):
+        rng = random.Random(seed)
+        size = rng.choice((12, 20, 30))
+        occupancy = OccupancyGrid(size)
+        density = rng.choice((0.1, 0.2, 0.3))
+        for index in range(size * size):
+            if rng.random() < density:
+                occupancy.occupy(occupancy.position(index))
+        head = occupancy.random_free_cell(rng)
+        occupancy.occupy(head)
+        goal = occupancy.random_free_cell(rng)
+        planner = IncrementalPlanner(size, size)
+        for _ in range(150):
+            path = planner.plan(occupancy, head, goal)
+            _assert_shortest(path, occupancy, head, goal)
+
+            for _ in range(rng.randrange(4)):
+                pos = occupancy.position(rng.randrange(size * size))
+                if pos in (head, goal):
+                    continue
+                if occupancy.cells[occupancy.index(pos)]:
+                    occupancy.release(pos)
+                else:
+                    occupancy.occupy(pos)
+            if path is not None and len(path) > 2:
+                occupancy.release(head)
+                head = path[1]
+                occupancy.occupy(head)
+            else:
+                goal = occupancy.random_free_cell(rng)
+                if goal is None:
+                    break
+        hits += planner.cache_hits
+        repairs += planner.repairs
+    assert hits and repairs
+
+
+def test_cached_games_plan_shortest_paths(monkeypatch):
+    """Retracting tails open shortcuts a few cells away from a cached path; they must be taken."""
+    plan = IncrementalPlanner.plan
+    plans = []
+
+    def checked_plan(self, occupancy, start_pos, goal_pos):
+        path = plan(self, occupancy, start_pos, goal_pos)
+        _assert_shortest(path, occupancy, start_pos, goal_pos)
+        plans.append(path)
+        return path
+
+    monkeypatch.setattr(IncrementalPlanner, "plan", checked_plan)
+    for seed in range(6):
+        Simulator(grid_size=16, num_snakes=8, planning_mode="cached", seed=seed).run_until_done(300)
+    assert plans